@@ -1,8 +1,11 @@
 from flask import Flask, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
 import os
 
+import json_utils
 from config import Config
+from logging_setup import configure_logging
 from green_api_client import GreenAPIClient
 from message_processor import MessageProcessor
 
@@ -17,7 +20,27 @@ from routes.customer_routes import customer_routes
 from routes.confirmation_routes import confirmation_routes
 from routes.escalation_routes import escalation_routes
 
+configure_logging()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, keeping Flask's output conventions"""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        option = json_utils.orjson.OPT_NON_STR_KEYS | json_utils.orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('indent'):
+            option |= json_utils.orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= json_utils.orjson.OPT_SORT_KEYS
+        # Datetimes are passed through to Flask's default handler so they keep
+        # the same HTTP-date format as before
+        return json_utils.orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return json_utils.orjson.loads(s)
+
 app = Flask(__name__)
+if json_utils.orjson is not None:
+    app.json = OrjsonProvider(app)
 
 # Register blueprints
 app.register_blueprint(app_control)
@@ -12,6 +12,14 @@ class Config:
     # Recipient phone number (with country code, no +)
     RECIPIENT_PHONE = os.getenv('RECIPIENT_PHONE')
     
+    # Phone numbers allowed to message the bot (comma-separated RECIPIENT_PHONES,
+    # defaulting to RECIPIENT_PHONE), as a set for O(1) webhook checks
+    AUTHORIZED_PHONES = frozenset(
+        phone.strip()
+        for phone in (os.getenv('RECIPIENT_PHONES') or RECIPIENT_PHONE or '').split(',')
+        if phone.strip()
+    )
+    
     # Reminder settings
     REMINDER_TIME = "17:00"  # 5:00 PM UTC (equivalent to 8:00 PM Israel time)
     REMINDER_MESSAGE = "זמן לכדור! 💊"
@@ -31,6 +39,10 @@ class Config:
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
     OPENAI_ENABLED = os.getenv('OPENAI_ENABLED', 'false').lower() == 'true'
+    # Smaller, faster model for short template-length outputs like escalations
+    OPENAI_ESCALATION_MODEL = os.getenv('OPENAI_ESCALATION_MODEL', 'gpt-4o-mini')
+    # Read timeout for OpenAI calls, in seconds
+    OPENAI_TIMEOUT_SECONDS = float(os.getenv('OPENAI_TIMEOUT_SECONDS', 10))
     
     # Database settings - Railway MySQL
     DATABASE_URL = os.getenv('DATABASE_URL')  # Railway provides this automatically
@@ -41,6 +53,15 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD')
     USE_MYSQL = os.getenv('USE_MYSQL', 'true').lower() == 'true'
     
+    # Connections kept in each process's MySQL connection pool (mysql-connector allows up to 32)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    
+    # Number of recently processed messages kept in memory
+    MAX_IN_MEMORY_HISTORY = int(os.getenv('MAX_IN_MEMORY_HISTORY', 1000))
+    
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    
     @classmethod
     def validate_config(cls):
         """Validate that all required configuration is present"""
@@ -1,35 +1,10 @@
-import os
-from openai import OpenAI
+from openai_client import get_openai_client
 from config import Config
 from typing import Dict, Tuple
 
-class ConfirmationAI:
-    def __init__(self):
-        """Initialize the confirmation AI service"""
-        if Config.OPENAI_ENABLED and Config.OPENAI_API_KEY:
-            self.openai_enabled = True
-            self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-            print("🤖 Confirmation AI enabled")
-        else:
-            self.openai_enabled = False
-            print("🤖 Confirmation AI disabled - using template responses")
-    
-    def analyze_confirmation(self, message: str, sender: str) -> Tuple[bool, str]:
-        """
-        Analyze a message to determine if the user confirmed taking their pill
-        
-        Args:
-            message: The user's message
-            sender: The sender's phone number
-            
-        Returns:
-            Tuple of (confirmed: bool, response_message: str)
-        """
-        if not self.openai_enabled:
-            return self._template_confirmation_analysis(message)
-        
-        try:
-            system_prompt = """אתה מערכת AI שמנתחת הודעות תגובה לתזכורות גלולת מניעת הריון. התפקיד שלך הוא לקבוע אם המשתמשת אישרה שלקחה את הגלולה או לא.
+# System prompt for confirmation analysis; kept constant so the request prefix
+# is identical across calls
+_CONFIRMATION_SYSTEM_PROMPT = """אתה מערכת AI שמנתחת הודעות תגובה לתזכורות גלולת מניעת הריון. התפקיד שלך הוא לקבוע אם המשתמשת אישרה שלקחה את הגלולה או לא.
 
 כללים:
 1. אם המשתמשת אישרה שלקחה את הגלולה - החזר TRUE
@@ -57,10 +32,36 @@ class ConfirmationAI:
     "response": "תגובה בעברית עם אימוג'ים"
 }"""
 
+class ConfirmationAI:
+    def __init__(self):
+        """Initialize the confirmation AI service"""
+        if Config.OPENAI_ENABLED and Config.OPENAI_API_KEY:
+            self.openai_enabled = True
+            self.client = get_openai_client()
+            print("🤖 Confirmation AI enabled")
+        else:
+            self.openai_enabled = False
+            print("🤖 Confirmation AI disabled - using template responses")
+    
+    def analyze_confirmation(self, message: str, sender: str) -> Tuple[bool, str]:
+        """
+        Analyze a message to determine if the user confirmed taking their pill
+        
+        Args:
+            message: The user's message
+            sender: The sender's phone number
+            
+        Returns:
+            Tuple of (confirmed: bool, response_message: str)
+        """
+        if not self.openai_enabled:
+            return self._template_confirmation_analysis(message)
+        
+        try:
             response = self.client.chat.completions.create(
                 model=Config.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _CONFIRMATION_SYSTEM_PROMPT},
                     {"role": "user", "content": f"הודעת המשתמשת: {message}"}
                 ],
                 max_tokens=200,
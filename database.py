@@ -1,12 +1,26 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
 import json
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
 from contextlib import contextmanager
 from config import Config
 import urllib.parse
+import threading
+import json_utils
+
+# Connections are pooled per process and shared by all Database instances, so
+# requests reuse an open connection instead of paying the TCP/TLS + auth handshake
+# (the pool size is Config.DB_POOL_SIZE)
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+# The schema (tables and indexes) only needs to be created once per process,
+# however many Database instances are constructed
+_schema_initialized = False
+_schema_lock = threading.Lock()
 
 class Database:
     def __init__(self):
@@ -15,14 +29,23 @@ class Database:
         """
         try:
             self.connection_params = self._get_connection_params()
-            print(f"🔗 Attempting database connection to {self.connection_params.get('host')}:{self.connection_params.get('port')}")
-            self._create_tables()
-            print("✅ Database initialized successfully")
+            self._ensure_schema()
         except Exception as e:
             print(f"❌ Database initialization failed: {e}")
             print(f"❌ Connection params: {self._redact_password(self.connection_params) if hasattr(self, 'connection_params') else 'Not set'}")
             raise e
     
+    def _ensure_schema(self):
+        """Create the tables the first time a Database is constructed in this process"""
+        global _schema_initialized
+        with _schema_lock:
+            if _schema_initialized:
+                return
+            print(f"🔗 Attempting database connection to {self.connection_params.get('host')}:{self.connection_params.get('port')}")
+            self._create_tables()
+            _schema_initialized = True
+            print("✅ Database initialized successfully")
+    
     def _redact_password(self, params):
         """Return connection params with password redacted for logging"""
         redacted = params.copy()
@@ -56,20 +79,55 @@ class Database:
                 'autocommit': False
             }
     
+    def _get_pool(self):
+        """Get the process-wide connection pool, creating it on first use"""
+        global _connection_pool
+        if _connection_pool is None:
+            with _connection_pool_lock:
+                if _connection_pool is None:
+                    _connection_pool = pooling.MySQLConnectionPool(
+                        pool_name='reminder_pool',
+                        pool_size=Config.DB_POOL_SIZE,
+                        **self.connection_params
+                    )
+        return _connection_pool
+    
+    def get_pool_size(self) -> int:
+        """
+        Get the number of connections in the process-wide connection pool
+        
+        Returns:
+            Pool size the pool was created with
+        """
+        return self._get_pool().pool_size
+    
+    def _connect(self):
+        """Take a connection from the pool, or open a dedicated one if it is exhausted"""
+        try:
+            return self._get_pool().get_connection()
+        except mysql.connector.errors.PoolError:
+            print(f"⚠️ Database connection pool exhausted ({Config.DB_POOL_SIZE} connections), opening a dedicated connection")
+            return mysql.connector.connect(**self.connection_params)
+    
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
+        """Context manager for database connections (closing returns pooled ones to the pool)"""
         conn = None
         try:
-            conn = mysql.connector.connect(**self.connection_params)
+            conn = self._connect()
             yield conn
         except Error as e:
             if conn:
                 conn.rollback()
             raise e
         finally:
-            if conn and conn.is_connected():
-                conn.close()
+            # Always close: a pooled connection must go back to the pool even if it dropped.
+            # Closing a dead session can itself fail; don't let that mask the real error
+            if conn:
+                try:
+                    conn.close()
+                except Error as e:
+                    print(f"⚠️ Error closing database connection: {e}")
     
     def _create_tables(self):
         """Create database tables if they don't exist"""
@@ -153,8 +211,42 @@ class Database:
                 )
             ''')
             
+            # AI-generated reminder messages, generated once per day
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS reminder_message_cache (
+                    cache_date VARCHAR(255) PRIMARY KEY,
+                    messages TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Indexes for the hot lookups (customer/date lookups are already
+            # covered by the unique_customer_date key)
+            self._ensure_index(cursor, 'daily_reminders', 'idx_daily_reminders_date_time', 'reminder_date, reminder_time')
+            self._ensure_index(cursor, 'customers', 'idx_customers_active_time', 'is_active, reminder_time')
+            self._ensure_index(cursor, 'reminders', 'idx_reminders_sent_time', 'sent, scheduled_time')
+            self._ensure_index(cursor, 'daily_reminders', 'idx_daily_reminders_escalation', 'confirmed, next_escalation_time')
+            self._ensure_index(cursor, 'messages', 'idx_messages_timestamp', 'timestamp')
+            
             conn.commit()
     
+    def _ensure_index(self, cursor, table: str, index_name: str, columns: str):
+        """
+        Create an index if it doesn't exist yet (MySQL has no CREATE INDEX IF NOT EXISTS)
+        
+        Args:
+            cursor: Open cursor to run the statements on
+            table: Table name
+            index_name: Index name
+            columns: Comma-separated column list
+        """
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        ''', (table, index_name))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+    
     def save_message(self, message_data: Dict) -> int:
         """
         Save a processed message to the database
@@ -181,6 +273,54 @@ class Database:
             conn.commit()
             return cursor.lastrowid
     
+    def save_messages_bulk(self, messages: List[Dict]) -> int:
+        """
+        Save many processed messages in a single transaction
+        
+        Args:
+            messages: List of message data dictionaries
+            
+        Returns:
+            Number of messages saved
+        """
+        if not messages:
+            return 0
+        
+        rows = [
+            (
+                message_data.get('sender', ''),
+                message_data.get('message', ''),
+                message_data.get('timestamp', ''),
+                message_data.get('action', ''),
+                message_data.get('ai_processed', False),
+                message_data.get('response', '')
+            )
+            for message_data in messages
+        ]
+        return self.save_message_rows(rows)
+    
+    def save_message_rows(self, rows: List[tuple]) -> int:
+        """
+        Save many processed messages, given as row tuples, in a single transaction
+        
+        Args:
+            rows: Tuples of (sender, message, timestamp, action, ai_processed, response)
+        
+        Returns:
+            Number of messages saved
+        """
+        if not rows:
+            return 0
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO messages (sender, message, timestamp, action, ai_processed, response)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', rows)
+            conn.commit()
+            return len(rows)
+    
     def get_message_history(self, limit: int = 10) -> List[Dict]:
         """
         Get recent message history
@@ -201,6 +341,27 @@ class Database:
             
             return cursor.fetchall()
     
+    def iter_message_history(self, limit: int = 1000) -> Iterator[Dict]:
+        """
+        Stream recent message history row by row instead of fetching it all at once
+        
+        Args:
+            limit: Maximum number of messages to yield
+        
+        Yields:
+            Message dictionaries, newest first
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT * FROM messages 
+                ORDER BY timestamp DESC 
+                LIMIT %s
+            ''', (limit,))
+            
+            for row in cursor:
+                yield row
+    
     def get_statistics(self) -> Dict:
         """
         Get database statistics
@@ -237,23 +398,41 @@ class Database:
                 'ai_processed': ai_processed
             }
     
-    def save_reminder(self, scheduled_time: str, message: str) -> int:
+    def get_messages_version(self) -> str:
+        """
+        Get a cheap version string for the messages table
+        
+        Changes whenever messages are saved or cleaned up, so it can be used to
+        validate cached statistics without running the aggregate queries.
+        
+        Returns:
+            Version string built from the message count and highest message ID
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*), COALESCE(MAX(id), 0) FROM messages')
+            count, max_id = cursor.fetchone()
+            return f"{count}-{max_id}"
+    
+    def save_reminder(self, scheduled_time: str, message: str, sent: bool = False) -> int:
         """
         Save a scheduled reminder
         
         Args:
             scheduled_time: ISO format timestamp
             message: Reminder message
-            
+            sent: Record the reminder as already sent (sets sent_at to now),
+                saving a separate mark_reminder_sent call
+        
         Returns:
             Reminder ID
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO reminders (scheduled_time, message)
-                VALUES (%s, %s)
-            ''', (scheduled_time, message))
+                INSERT INTO reminders (scheduled_time, message, sent, sent_at)
+                VALUES (%s, %s, %s, IF(%s, NOW(), NULL))
+            ''', (scheduled_time, message, sent, sent))
             conn.commit()
             return cursor.lastrowid
     
@@ -309,6 +488,29 @@ class Database:
             result = cursor.fetchone()
             return result['scheduled_date'] if result else None
     
+    def reminder_sent_since(self, since_date: str) -> bool:
+        """
+        Check whether a reminder was sent on or after a date
+        
+        Args:
+            since_date: Date in YYYY-MM-DD format (UTC)
+        
+        Returns:
+            True if a sent reminder is scheduled on or after the date
+        """
+        # scheduled_time is an ISO timestamp, so a text comparison against the
+        # date uses the (sent, scheduled_time) index
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT EXISTS(
+                    SELECT 1 FROM reminders
+                    WHERE sent = 1 AND scheduled_time >= %s
+                )
+            ''', (since_date,))
+            
+            return cursor.fetchone()[0] == 1
+    
     def save_scheduled_reminder(self, scheduled_time: datetime, message: str = None):
         """
         Save a scheduled reminder with date tracking
@@ -356,6 +558,45 @@ class Database:
             
             return cursor.fetchall()
     
+    def get_missed_reminders_summary(self, days_back: int = 7) -> Dict:
+        """
+        Get missed reminder dates and the last sent reminder date in one query
+        
+        Args:
+            days_back: Number of days to look back
+        
+        Returns:
+            Dictionary with total_missed, missed_dates and last_sent
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            # The single-row derived table keeps last_sent in the result even
+            # when there are no missed reminders to join
+            cursor.execute('''
+                SELECT l.last_sent, m.id AS missed_id, m.scheduled_date
+                FROM (
+                    SELECT (
+                        SELECT scheduled_date FROM reminders
+                        WHERE sent = 1
+                        ORDER BY sent_at DESC
+                        LIMIT 1
+                    ) AS last_sent
+                ) l
+                LEFT JOIN reminders m
+                    ON m.sent = 0
+                    AND m.scheduled_time < NOW()
+                    AND m.scheduled_time >= DATE_SUB(NOW(), INTERVAL %s DAY)
+                ORDER BY m.scheduled_time DESC
+            ''', (days_back,))
+            rows = cursor.fetchall()
+        
+        missed = [row for row in rows if row['missed_id'] is not None]
+        return {
+            "total_missed": len(missed),
+            "missed_dates": [row['scheduled_date'] for row in missed if row['scheduled_date']],
+            "last_sent": rows[0]['last_sent'] if rows else None
+        }
+    
     def cleanup_old_messages(self, days_to_keep: int = 90):
         """
         Remove old messages to keep database size manageable
@@ -429,6 +670,70 @@ class Database:
             conn.commit()
             return cursor.lastrowid
     
+    def create_customer(self, phone_number: str, name: str = None, reminder_time: str = '20:00') -> Optional[Dict]:
+        """
+        Add a new customer and return the stored row over one connection
+        
+        Args:
+            phone_number: Phone number with country code (no +)
+            name: Optional customer name
+            reminder_time: Reminder time in HH:MM format (default: 20:00)
+        
+        Returns:
+            The new customer dictionary, or None if the phone number already exists
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute('''
+                    INSERT INTO customers (phone_number, name, reminder_time)
+                    VALUES (%s, %s, %s)
+                ''', (phone_number, name, reminder_time))
+            except mysql.connector.IntegrityError as e:
+                # Duplicate phone number (unique key violation)
+                if e.errno == 1062:
+                    return None
+                raise
+            conn.commit()
+            
+            cursor.execute('SELECT * FROM customers WHERE id = %s', (cursor.lastrowid,))
+            return cursor.fetchone()
+    
+    def add_customers_bulk(self, customers: List[Tuple[str, Optional[str], str]]) -> List[str]:
+        """
+        Add many customers in one transaction, skipping existing phone numbers
+        
+        Args:
+            customers: List of (phone_number, name, reminder_time) tuples
+        
+        Returns:
+            Phone numbers of the customers that were added
+        """
+        if not customers:
+            return []
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ', '.join(['%s'] * len(customers))
+            cursor.execute(
+                f"SELECT phone_number FROM customers WHERE phone_number IN ({placeholders})",
+                [phone_number for phone_number, _, _ in customers]
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            new_customers = [c for c in customers if c[0] not in existing]
+            
+            if new_customers:
+                # executemany sends a single multi-row INSERT; the no-op update
+                # covers a phone number added concurrently since the SELECT
+                cursor.executemany('''
+                    INSERT INTO customers (phone_number, name, reminder_time)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE id = id
+                ''', new_customers)
+                conn.commit()
+            
+            return [phone_number for phone_number, _, _ in new_customers]
+    
     def get_customers(self, active_only: bool = True) -> List[Dict]:
         """
         Get all customers
@@ -455,6 +760,25 @@ class Database:
             
             return cursor.fetchall()
     
+    def get_first_customer(self) -> Optional[Dict]:
+        """
+        Get the first active customer in get_customers() order (newest first)
+        without loading the rest
+        
+        Returns:
+            Customer dictionary or None if there are no active customers
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT * FROM customers 
+                WHERE is_active = 1 
+                ORDER BY created_at DESC
+                LIMIT 1
+            ''')
+            
+            return cursor.fetchone()
+
     def get_customer_by_phone(self, phone_number: str) -> Optional[Dict]:
         """
         Get a customer by phone number
@@ -474,6 +798,31 @@ class Database:
             
             return cursor.fetchone()
     
+    def get_customer_and_daily_reminder(self, phone_number: str, reminder_date: str) -> Optional[Dict]:
+        """
+        Get a customer and their daily reminder for a date in one query
+        
+        Args:
+            phone_number: Phone number to search for
+            reminder_date: Date in YYYY-MM-DD format
+        
+        Returns:
+            Dictionary with customer_id, daily_reminder_id and confirmed
+            (the reminder fields are None if there is no reminder that day),
+            or None if the customer was not found
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT c.id AS customer_id, dr.id AS daily_reminder_id, dr.confirmed
+                FROM customers c
+                LEFT JOIN daily_reminders dr
+                    ON dr.customer_id = c.id AND dr.reminder_date = %s
+                WHERE c.phone_number = %s
+            ''', (reminder_date, phone_number))
+            
+            return cursor.fetchone()
+    
     def update_customer(self, customer_id: int, name: str = None, is_active: bool = None, reminder_time: str = None) -> bool:
         """
         Update customer information
@@ -604,6 +953,62 @@ class Database:
             conn.commit()
             return cursor.lastrowid
     
+    def delete_daily_reminder(self, reminder_id: int) -> bool:
+        """
+        Delete a daily reminder record
+        
+        Args:
+            reminder_id: ID of the daily reminder
+        
+        Returns:
+            True if a record was deleted
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM daily_reminders WHERE id = %s', (reminder_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def create_daily_reminders_for_customers(self, reminder_date: str, reminder_time: str, message_sent: str,
+                                             next_escalation_time: datetime, customer_reminder_time: str = None) -> int:
+        """
+        Create daily reminder records for all active customers in one INSERT ... SELECT
+        
+        Each record starts at escalation level 0 with its first escalation scheduled,
+        and the reminder itself logged as the first escalation message. Customers
+        who already have a record for the date are skipped.
+        
+        Args:
+            reminder_date: Date in YYYY-MM-DD format
+            reminder_time: Time the reminder was sent, in HH:MM format
+            message_sent: The reminder message that was sent
+            next_escalation_time: When to send the first escalation
+            customer_reminder_time: Only create records for customers with this
+                reminder time (HH:MM). If None, all active customers.
+        
+        Returns:
+            Number of records created
+        """
+        messages_sent = json_utils.dumps([{
+            'level': 0,
+            'message': message_sent,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }])
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO daily_reminders (customer_id, reminder_date, reminder_time, message_sent,
+                                             escalation_level, next_escalation_time, escalation_messages_sent)
+                SELECT id, %s, %s, %s, 0, %s, %s
+                FROM customers
+                WHERE is_active = 1 AND (%s IS NULL OR reminder_time = %s)
+                ON DUPLICATE KEY UPDATE id = daily_reminders.id
+            ''', (reminder_date, reminder_time, message_sent, next_escalation_time, messages_sent,
+                  customer_reminder_time, customer_reminder_time))
+            conn.commit()
+            return cursor.rowcount
+    
     def get_daily_reminder(self, customer_id: int, reminder_date: str) -> Optional[Dict]:
         """
         Get a daily reminder record
@@ -648,6 +1053,78 @@ class Database:
             
             return cursor.rowcount > 0
     
+    def confirm_daily_reminder(self, customer_id: int, reminder_date: str, confirmed: bool, confirmation_message: str = None) -> bool:
+        """
+        Record a confirmation and, if confirmed, stop escalations in one statement
+        
+        Args:
+            customer_id: ID of the customer
+            reminder_date: Date in YYYY-MM-DD format
+            confirmed: Whether the reminder was confirmed
+            confirmation_message: Optional confirmation message
+        
+        Returns:
+            True if update successful
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE daily_reminders
+                SET confirmed = %s, confirmation_message = %s, confirmation_time = NOW(),
+                    next_escalation_time = IF(%s, NULL, next_escalation_time)
+                WHERE customer_id = %s AND reminder_date = %s
+            ''', (confirmed, confirmation_message, confirmed, customer_id, reminder_date))
+            conn.commit()
+            
+            return cursor.rowcount > 0
+    
+    def get_reminder_messages(self, cache_date: str) -> Optional[List[str]]:
+        """
+        Get the cached AI reminder messages for a date
+        
+        Args:
+            cache_date: Date in YYYY-MM-DD format
+        
+        Returns:
+            List of reminder messages, or None if none were cached for that date
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT messages FROM reminder_message_cache
+                WHERE cache_date = %s
+            ''', (cache_date,))
+            
+            result = cursor.fetchone()
+            if not result:
+                return None
+            try:
+                return json_utils.loads(result[0]) or None
+            except (json.JSONDecodeError, ValueError):
+                return None
+    
+    def save_reminder_messages(self, cache_date: str, messages: List[str]) -> bool:
+        """
+        Cache the AI reminder messages for a date, replacing any existing ones
+        
+        Args:
+            cache_date: Date in YYYY-MM-DD format
+            messages: List of reminder messages
+        
+        Returns:
+            True if saved successfully
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO reminder_message_cache (cache_date, messages)
+                VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE messages = VALUES(messages)
+            ''', (cache_date, json_utils.dumps(messages)))
+            conn.commit()
+            
+            return cursor.rowcount > 0
+    
     def get_pending_confirmations(self, days_back: int = 7) -> List[Dict]:
         """
         Get daily reminders that haven't been confirmed yet
@@ -671,6 +1148,64 @@ class Database:
             
             return cursor.fetchall()
     
+    def get_customer_confirmations(self, customer_id: int, days_back: int = 30) -> Optional[Dict]:
+        """
+        Get a customer and their recent daily reminders over one connection
+        
+        Args:
+            customer_id: ID of the customer
+            days_back: Number of days to look back
+        
+        Returns:
+            Dictionary with 'customer' and 'confirmations' (newest first),
+            or None if the customer was not found
+        """
+        # ISO date strings compare correctly as text, so the filter can use the
+        # (customer_id, reminder_date) key directly
+        since_date = (datetime.now(timezone.utc).date() - timedelta(days=days_back)).isoformat()
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT * FROM customers WHERE id = %s
+            ''', (customer_id,))
+            customer = cursor.fetchone()
+            if not customer:
+                return None
+            
+            cursor.execute('''
+                SELECT * FROM daily_reminders
+                WHERE customer_id = %s AND reminder_date >= %s
+                ORDER BY reminder_date DESC
+            ''', (customer_id, since_date))
+            
+            return {
+                'customer': customer,
+                'confirmations': cursor.fetchall()
+            }
+    
+    def get_confirmations_by_date(self, reminder_date: str) -> List[Dict]:
+        """
+        Get all daily reminders for a date with customer details
+        
+        Args:
+            reminder_date: Date in YYYY-MM-DD format
+        
+        Returns:
+            List of daily reminder dictionaries ordered by reminder time
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT dr.*, c.name as customer_name, c.phone_number
+                FROM daily_reminders dr
+                JOIN customers c ON dr.customer_id = c.id
+                WHERE dr.reminder_date = %s
+                ORDER BY dr.reminder_time ASC
+            ''', (reminder_date,))
+            
+            return cursor.fetchall()
+    
     def get_confirmation_stats(self, days_back: int = 30) -> Dict:
         """
         Get confirmation statistics
@@ -723,7 +1258,8 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             cursor.execute('''
-                SELECT dr.*, c.name as customer_name, c.phone_number
+                SELECT dr.*, c.name as customer_name, c.phone_number,
+                       CONCAT(c.phone_number, '@c.us') as chat_id
                 FROM daily_reminders dr
                 JOIN customers c ON dr.customer_id = c.id
                 WHERE dr.confirmed = 0 
@@ -734,7 +1270,65 @@ class Database:
             
             return cursor.fetchall()
     
-    def update_escalation(self, reminder_id: int, escalation_level: int, next_escalation_time: str, escalation_message: str) -> bool:
+    def get_reminder_needing_escalation(self, reminder_id: int) -> Optional[Dict]:
+        """
+        Get one reminder if it needs escalation (same conditions as
+        get_reminders_needing_escalation), looked up by primary key
+        
+        Args:
+            reminder_id: ID of the daily reminder
+        
+        Returns:
+            The reminder, or None if it doesn't exist or doesn't need escalation
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT dr.*, c.name as customer_name, c.phone_number,
+                       CONCAT(c.phone_number, '@c.us') as chat_id
+                FROM daily_reminders dr
+                JOIN customers c ON dr.customer_id = c.id
+                WHERE dr.id = %s
+                AND dr.confirmed = 0 
+                AND dr.next_escalation_time IS NOT NULL
+                AND STR_TO_DATE(dr.next_escalation_time, '%Y-%m-%d %H:%i:%s') <= NOW()
+            ''', (reminder_id,))
+            
+            return cursor.fetchone()
+
+    def get_pending_escalations(self, max_escalation_level: int, max_age: timedelta) -> List[Dict]:
+        """
+        Get reminders that are due for their next escalation, with the stop
+        conditions (confirmed, max level reached, window expired) applied in SQL
+        
+        Args:
+            max_escalation_level: Reminders at or above this level are not escalated
+            max_age: Reminders created longer ago than this are not escalated
+        
+        Returns:
+            List of reminders to escalate
+        """
+        # next_escalation_time is stored as 'YYYY-MM-DD HH:MM:SS' (UTC), so a
+        # plain string comparison can use the (confirmed, next_escalation_time) index
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute('''
+                SELECT dr.*, c.name as customer_name, c.phone_number,
+                       CONCAT(c.phone_number, '@c.us') as chat_id
+                FROM daily_reminders dr
+                JOIN customers c ON dr.customer_id = c.id
+                WHERE dr.confirmed = 0 
+                AND dr.next_escalation_time <= %s
+                AND dr.escalation_level < %s
+                AND dr.created_at >= NOW() - INTERVAL %s SECOND
+                ORDER BY dr.reminder_date ASC
+            ''', (now, max_escalation_level, int(max_age.total_seconds())))
+            
+            return cursor.fetchall()
+    
+    def update_escalation(self, reminder_id: int, escalation_level: int, next_escalation_time: datetime, escalation_message: str) -> bool:
         """
         Update escalation information for a reminder
         
@@ -760,7 +1354,7 @@ class Database:
                 # Handle NULL or empty values - initialize as empty list if None
                 messages_json = result[0] if result[0] is not None and result[0].strip() else '[]'
                 try:
-                    current_messages = json.loads(messages_json)
+                    current_messages = json_utils.loads(messages_json)
                 except (json.JSONDecodeError, ValueError):
                     current_messages = []
                 
@@ -776,13 +1370,72 @@ class Database:
                         next_escalation_time = %s,
                         escalation_messages_sent = %s
                     WHERE id = %s
-                ''', (escalation_level, next_escalation_time, json.dumps(current_messages), reminder_id))
+                ''', (escalation_level, next_escalation_time, json_utils.dumps(current_messages), reminder_id))
                 conn.commit()
                 
                 return cursor.rowcount > 0
             
             return False
     
+    def bulk_update_escalations(self, updates: List[Tuple[int, int, datetime, str]]) -> int:
+        """
+        Update escalation information for several reminders in one transaction
+        
+        Args:
+            updates: List of (reminder_id, escalation_level, next_escalation_time,
+                escalation_message) tuples
+        
+        Returns:
+            Number of reminders updated
+        """
+        if not updates:
+            return 0
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Get current escalation messages for all reminders at once
+            placeholders = ', '.join(['%s'] * len(updates))
+            cursor.execute(
+                f"SELECT id, escalation_messages_sent FROM daily_reminders WHERE id IN ({placeholders})",
+                [update[0] for update in updates]
+            )
+            messages_by_id = dict(cursor.fetchall())
+            
+            timestamp = datetime.now(timezone.utc).isoformat()
+            rows = []
+            for reminder_id, escalation_level, next_escalation_time, escalation_message in updates:
+                if reminder_id not in messages_by_id:
+                    continue
+                
+                # Handle NULL or empty values - initialize as empty list if None
+                messages_json = messages_by_id[reminder_id]
+                if messages_json is None or not messages_json.strip():
+                    messages_json = '[]'
+                try:
+                    current_messages = json_utils.loads(messages_json)
+                except (json.JSONDecodeError, ValueError):
+                    current_messages = []
+                
+                current_messages.append({
+                    'level': escalation_level,
+                    'message': escalation_message,
+                    'timestamp': timestamp
+                })
+                rows.append((escalation_level, next_escalation_time, json_utils.dumps(current_messages), reminder_id))
+            
+            if rows:
+                cursor.executemany('''
+                    UPDATE daily_reminders 
+                    SET escalation_level = %s, 
+                        next_escalation_time = %s,
+                        escalation_messages_sent = %s
+                    WHERE id = %s
+                ''', rows)
+                conn.commit()
+            
+            return len(rows)
+    
     def stop_escalations_for_customer(self, customer_id: int, reminder_date: str) -> bool:
         """
         Stop escalations for a customer on a specific date (when they confirm)
@@ -815,31 +1468,28 @@ class Database:
         Returns:
             Dictionary with escalation statistics
         """
+        # ISO date strings compare correctly as text, so the range can use the
+        # (reminder_date, reminder_time) index
+        since_date = (datetime.now(timezone.utc).date() - timedelta(days=days_back)).isoformat()
+        
         with self.get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             
-            # Get total escalations sent
-            cursor.execute('''
-                SELECT COUNT(*) as total_escalations FROM daily_reminders 
-                WHERE escalation_level > 0 
-                AND STR_TO_DATE(reminder_date, '%Y-%m-%d') >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-            ''', (days_back,))
-            total_escalations = cursor.fetchone()['total_escalations']
-            
-            # Get escalations by level
+            # Get escalations by level; the total is their sum
             cursor.execute('''
                 SELECT escalation_level, COUNT(*) as count 
                 FROM daily_reminders 
-                WHERE escalation_level > 0 
-                AND STR_TO_DATE(reminder_date, '%Y-%m-%d') >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+                WHERE reminder_date >= %s
+                AND escalation_level > 0 
                 GROUP BY escalation_level
-            ''', (days_back,))
+            ''', (since_date,))
             
-            escalation_by_level = {}
-            for row in cursor.fetchall():
-                escalation_by_level[f"level_{row['escalation_level']}"] = row['count']
+            escalation_by_level = {
+                f"level_{row['escalation_level']}": row['count']
+                for row in cursor.fetchall()
+            }
             
             return {
-                'total_escalations': total_escalations,
+                'total_escalations': sum(escalation_by_level.values()),
                 'by_level': escalation_by_level
             }
\ No newline at end of file
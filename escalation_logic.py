@@ -1,34 +1,121 @@
+import json
+import logging
 import os
 import sys
-from datetime import datetime, timedelta
-import pytz
-from typing import Optional, Tuple
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 
 # Add the current directory to Python path to import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from config import Config
 from green_api_client import GreenAPIClient
-from openai import OpenAI
+from openai_client import get_openai_client
+
+logger = logging.getLogger(__name__)
+
+UTC = timezone.utc
+
+# Static part of the escalation system prompt. It is kept byte-identical across
+# requests and placed first so the provider can serve it from its prompt cache;
+# only the short level-specific suffix changes between calls.
+_ESCALATION_SYSTEM_PREFIX = """אתה מערכת AI ששולחת תזכורות הולכות ומתעצמות לגלולת מניעת הריון. 
+
+כללים:
+- תמיד בעברית
+- תמיד עם אימוג'ים מתאימים
+- התייחס לזמן שחלף (30 דקות, שעה, שעה וחצי, שעתיים)
+- הדגש את החשיבות של לקיחת הגלולה
+- היה אמפתי אבל הולך ומתעצם
+- השתמש במונחים: כדור, גלולה
+- הודעה קצרה (מקסימום 2-3 משפטים)
+
+דוגמאות לרמות הסלמה:
+1: "היי! עדיין לא לקחת את הכדור? ⏰💊"
+2: "אני מחכה... הכדור שלך עדיין מחכה! 😤💊"
+3: "זה כבר שעה וחצי! הכדור לא יקח את עצמו! 😠💊"
+4: "שתי שעות! זה לא משחק! קחי את הכדור עכשיו! 😡💊\""""
+
+# AI escalation variants are generated in batches per level and rotated
+# round-robin for the rest of the UTC day (like the daily reminder messages),
+# so every escalation doesn't cost an API call. Escalations are 30 minutes
+# apart, so a shorter lifetime would expire the pool just before its next use
+ESCALATION_POOL_SIZE = 5
+
+# Stop escalating once this much time has passed since the initial reminder
+MAX_ESCALATION_WINDOW = timedelta(hours=2)
+
+# Stop escalating after this many escalations (4 escalations + initial = 5 total)
+MAX_ESCALATION_LEVEL = 4
+
+# Escalations are 2-3 short sentences (~40 tokens); a tight cap keeps decode time low
+ESCALATION_MAX_TOKENS = 80
+
+# Maximum number of messages requested from the model in one batched call
+ESCALATION_BATCH_SIZE = 12
+
+_ESCALATION_BATCH_INSTRUCTIONS = """תקבל מערך JSON של בקשות. לכל בקשה יש idx, רמת הסלמה (level) והנחיות לרמה (guidance).
+צור הודעה נפרדת ושונה לכל בקשה לפי הרמה שלה.
+החזר אך ורק מערך JSON בפורמט: [{"idx": 0, "msg": "..."}]"""
+
+_ESCALATION_LEVEL_PROMPTS = {
+    1: "Gentle reminder - slightly more urgent than initial message, show concern but not angry",
+    2: "More direct - emphasize the importance and show growing concern",
+    3: "Firm but caring - make it clear this is serious but still supportive",
+    4: "Final warning - urgent and direct but still caring, emphasize the consequences"
+}
+
+def _build_escalation_system_prompt(escalation_level: int) -> str:
+    """Render the full system prompt for one escalation level"""
+    return (
+        f"{_ESCALATION_SYSTEM_PREFIX}\n\n"
+        f"התפקיד שלך הוא ליצור הודעה ברמת הסלמה {escalation_level}:\n"
+        f"{_ESCALATION_LEVEL_PROMPTS[escalation_level]}\n\n"
+        f"צור הודעה מתאימה לרמה {escalation_level}:"
+    )
+
+# Fully rendered system prompts, built once at import
+_ESCALATION_SYSTEM_PROMPTS = {
+    level: _build_escalation_system_prompt(level) for level in _ESCALATION_LEVEL_PROMPTS
+}
+_ESCALATION_BATCH_SYSTEM_PROMPT = f"{_ESCALATION_SYSTEM_PREFIX}\n\n{_ESCALATION_BATCH_INSTRUCTIONS}"
 
 class EscalationLogic:
+    # Fallback messages per escalation level, used when AI is disabled or fails
+    _ESCALATION_TEMPLATES = {
+        1: "היי! עדיין לא לקחת את הכדור? ⏰💊\nזכרי - זה חשוב לבריאות שלך!",
+        2: "אני מחכה... הכדור שלך עדיין מחכה! 😤💊\nזה כבר שעה - אל תשכחי!",
+        3: "זה כבר שעה וחצי! הכדור לא יקח את עצמו! 😠💊\nבואי, זה רק דקה אחת!",
+        4: "שתי שעות! זה לא משחק! קחי את הכדור עכשיו! 😡💊\nזה חשוב מדי בשביל לדחות!"
+    }
+    
     def __init__(self):
         self.green_api = GreenAPIClient()
-        self.utc_tz = pytz.timezone('UTC')  # Use UTC timezone
+        
+        # Per-level pool of AI variants: level -> (messages, UTC date generated)
+        self._variant_pool: Dict[int, Tuple[List[str], str]] = {}
+        self._pool_cursor: Dict[int, int] = {}
+        self._pool_lock = threading.Lock()
         
         # Initialize OpenAI if enabled
         if Config.OPENAI_ENABLED and Config.OPENAI_API_KEY:
             self.openai_enabled = True
-            self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-            print("🤖 Escalation AI enabled")
+            self.client = get_openai_client()
+            logger.info("🤖 Escalation AI enabled")
         else:
             self.openai_enabled = False
-            print("🤖 Escalation AI disabled - using template responses")
+            logger.info("🤖 Escalation AI disabled - using template responses")
     
     def generate_escalation_message(self, escalation_level: int, customer_name: str = None) -> str:
         """
         Generate an escalation message based on the level
         
+        Messages are served round-robin from a small per-level pool of AI
+        variants, so repeated escalations reuse one API call instead of
+        making a new one per customer. The customer's name is added to the
+        chosen variant the same way as for the template messages.
+        
         Args:
             escalation_level: Level of escalation (1-4)
             customer_name: Optional customer name for personalization
@@ -39,53 +126,159 @@ class EscalationLogic:
         if not self.openai_enabled:
             return self._template_escalation_message(escalation_level, customer_name)
         
-        try:
-            escalation_prompts = {
-                1: "Gentle reminder - slightly more urgent than initial message, show concern but not angry",
-                2: "More direct - emphasize the importance and show growing concern",
-                3: "Firm but caring - make it clear this is serious but still supportive",
-                4: "Final warning - urgent and direct but still caring, emphasize the consequences"
-            }
+        variants = self._get_escalation_variants(escalation_level)
+        if not variants:
+            return self._template_escalation_message(escalation_level, customer_name)
+        
+        with self._pool_lock:
+            index = self._pool_cursor.get(escalation_level, 0)
+            self._pool_cursor[escalation_level] = index + 1
+        
+        message = variants[index % len(variants)]
+        return f"{customer_name}! {message}" if customer_name else message
+    
+    def _get_escalation_variants(self, escalation_level: int) -> List[str]:
+        """
+        Get the cached AI variants for a level, regenerating them once expired
+        
+        Args:
+            escalation_level: Level of escalation (1-4)
             
-            system_prompt = f"""אתה מערכת AI ששולחת תזכורות הולכות ומתעצמות לגלולת מניעת הריון. 
-
-התפקיד שלך הוא ליצור הודעה ברמת הסלמה {escalation_level}:
-{escalation_prompts[escalation_level]}
-
-כללים:
-- תמיד בעברית
-- תמיד עם אימוג'ים מתאימים
-- התייחס לזמן שחלף (30 דקות, שעה, שעה וחצי, שעתיים)
-- הדגש את החשיבות של לקיחת הגלולה
-- היה אמפתי אבל הולך ומתעצם
-- השתמש במונחים: כדור, גלולה
-- הודעה קצרה (מקסימום 2-3 משפטים)
-
-דוגמאות לרמות הסלמה:
-1: "היי! עדיין לא לקחת את הכדור? ⏰💊"
-2: "אני מחכה... הכדור שלך עדיין מחכה! 😤💊"
-3: "זה כבר שעה וחצי! הכדור לא יקח את עצמו! 😠💊"
-4: "שתי שעות! זה לא משחק! קחי את הכדור עכשיו! 😡💊"
-
-צור הודעה מתאימה לרמה {escalation_level}:"""
+        Returns:
+            List of escalation messages (empty if generation failed)
+        """
+        cached = self._get_cached_variants(escalation_level)
+        if cached:
+            return cached
+        
+        try:
+            system_prompt = _ESCALATION_SYSTEM_PROMPTS[escalation_level]
 
             response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
+                model=Config.OPENAI_ESCALATION_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"צור הודעת הסלמה לרמה {escalation_level}"}
                 ],
-                max_tokens=150,
-                temperature=0.7
+                max_tokens=ESCALATION_MAX_TOKENS,
+                temperature=0.7,
+                stop=["\n\n"],
+                n=ESCALATION_POOL_SIZE
             )
 
-            escalation_message = response.choices[0].message.content.strip()
-            print(f"🤖 AI Generated Escalation Level {escalation_level}: {escalation_message}")
-            return escalation_message
+            # Log prompt-cache hits so we can verify the static prefix is being reused
+            usage = getattr(response, 'usage', None)
+            prompt_details = getattr(usage, 'prompt_tokens_details', None)
+            cached_tokens = getattr(prompt_details, 'cached_tokens', None)
+            if cached_tokens is not None:
+                logger.info("🧠 Escalation prompt tokens: %s (cached: %s)", usage.prompt_tokens, cached_tokens)
+
+            variants = [
+                choice.message.content.strip()
+                for choice in response.choices
+                if choice.message.content and choice.message.content.strip()
+            ]
+            logger.info("🤖 AI Generated %s escalation variants for level %s", len(variants), escalation_level)
             
         except Exception as e:
-            print(f"❌ OpenAI API error generating escalation: {e}")
-            return self._template_escalation_message(escalation_level, customer_name)
+            logger.error("❌ OpenAI API error generating escalation: %s", e)
+            return []
+        
+        if variants:
+            with self._pool_lock:
+                self._variant_pool[escalation_level] = (variants, self._pool_date())
+        
+        return variants
+    
+    @staticmethod
+    def _pool_date() -> str:
+        """Today's UTC date, which keys the variant pools"""
+        return datetime.now(UTC).date().isoformat()
+    
+    def _get_cached_variants(self, escalation_level: int) -> Optional[List[str]]:
+        """Return the pooled variants for a level if they were generated today (UTC)"""
+        with self._pool_lock:
+            cached = self._variant_pool.get(escalation_level)
+            if cached and cached[1] == self._pool_date():
+                return cached[0]
+        return None
+    
+    def generate_escalation_messages_batch(self, requests: List[Tuple[int, Optional[str]]]) -> List[str]:
+        """
+        Generate escalation messages for several customers at once
+        
+        Levels whose variant pool is missing or expired are refilled together
+        in as few API calls as possible, then each request is served from the pool.
+        
+        Args:
+            requests: List of (escalation_level, customer_name) tuples
+            
+        Returns:
+            List of escalation messages, in the same order as requests
+        """
+        if self.openai_enabled:
+            self._refill_escalation_pools({level for level, _ in requests})
+        
+        return [self.generate_escalation_message(level, name) for level, name in requests]
+    
+    def _refill_escalation_pools(self, levels: set) -> None:
+        """
+        Regenerate the variant pools for the given levels with batched API calls
+        
+        Args:
+            levels: Escalation levels that are about to be used
+        """
+        missing_levels = sorted(
+            level for level in levels
+            if level in _ESCALATION_LEVEL_PROMPTS and not self._get_cached_variants(level)
+        )
+        if not missing_levels:
+            return
+        
+        # One slot per variant we want; the model fills each slot in the JSON reply
+        slots = [level for level in missing_levels for _ in range(ESCALATION_POOL_SIZE)]
+        generated: Dict[int, List[str]] = {}
+        
+        for start in range(0, len(slots), ESCALATION_BATCH_SIZE):
+            chunk = slots[start:start + ESCALATION_BATCH_SIZE]
+            batch_request = json.dumps(
+                [
+                    {"idx": idx, "level": level, "guidance": _ESCALATION_LEVEL_PROMPTS[level]}
+                    for idx, level in enumerate(chunk)
+                ],
+                ensure_ascii=False
+            )
+            
+            try:
+                response = self.client.chat.completions.create(
+                    model=Config.OPENAI_ESCALATION_MODEL,
+                    messages=[
+                        {"role": "system", "content": _ESCALATION_BATCH_SYSTEM_PROMPT},
+                        {"role": "user", "content": batch_request}
+                    ],
+                    max_tokens=ESCALATION_MAX_TOKENS * len(chunk),
+                    temperature=0.7
+                )
+                
+                content = response.choices[0].message.content.strip()
+                # Tolerate markdown fences or chatter around the JSON array
+                items = json.loads(content[content.find('['):content.rfind(']') + 1])
+                
+                for item in items:
+                    idx = int(item['idx'])
+                    message = str(item.get('msg', '')).strip()
+                    if 0 <= idx < len(chunk) and message:
+                        generated.setdefault(chunk[idx], []).append(message)
+                        
+            except Exception as e:
+                logger.error("❌ OpenAI API error generating escalation batch: %s", e)
+        
+        if generated:
+            pool_date = self._pool_date()
+            with self._pool_lock:
+                for level, variants in generated.items():
+                    self._variant_pool[level] = (variants, pool_date)
+            logger.info("🤖 AI Generated escalation variants for levels %s in one batch", sorted(generated))
     
     def _template_escalation_message(self, escalation_level: int, customer_name: str = None) -> str:
         """
@@ -98,16 +291,8 @@ class EscalationLogic:
         Returns:
             Escalation message
         """
-        name_part = f"{customer_name}! " if customer_name else ""
-        
-        escalation_templates = {
-            1: f"{name_part}היי! עדיין לא לקחת את הכדור? ⏰💊\nזכרי - זה חשוב לבריאות שלך!",
-            2: f"{name_part}אני מחכה... הכדור שלך עדיין מחכה! 😤💊\nזה כבר שעה - אל תשכחי!",
-            3: f"{name_part}זה כבר שעה וחצי! הכדור לא יקח את עצמו! 😠💊\nבואי, זה רק דקה אחת!",
-            4: f"{name_part}שתי שעות! זה לא משחק! קחי את הכדור עכשיו! 😡💊\nזה חשוב מדי בשביל לדחות!"
-        }
-        
-        return escalation_templates.get(escalation_level, escalation_templates[1])
+        message = self._ESCALATION_TEMPLATES.get(escalation_level, self._ESCALATION_TEMPLATES[1])
+        return f"{customer_name}! {message}" if customer_name else message
     
     def send_escalation(self, reminder_data: dict) -> bool:
         """
@@ -119,34 +304,68 @@ class EscalationLogic:
         Returns:
             True if sent successfully, False otherwise
         """
+        return self.send_escalations([reminder_data])[0] is not None
+    
+    def send_escalations(self, reminders: List[dict]) -> List[Optional[str]]:
+        """
+        Send escalation messages to several customers, generating them in one batch
+        and sending them concurrently
+        
+        Args:
+            reminders: Daily reminder data from database
+        
+        Returns:
+            The message sent for each reminder, or None where sending failed
+        """
+        if not reminders:
+            return []
+        
+        messages = self.generate_escalation_messages_batch([
+            (reminder.get('escalation_level', 0) + 1, reminder.get('customer_name'))
+            for reminder in reminders
+        ])
+        
+        logger.info("🚨 Sending %s escalation messages", len(reminders))
+        
+        # Send via WhatsApp; total time is bounded by the slowest send, not the sum
+        responses = self.green_api.send_messages([
+            (reminder.get('chat_id') or reminder['phone_number'], message)
+            for reminder, message in zip(reminders, messages)
+        ])
+        
+        return [
+            self._check_escalation_response(reminder, message, response)
+            for reminder, message, response in zip(reminders, messages, responses)
+        ]
+    
+    def _check_escalation_response(self, reminder_data: dict, escalation_message: str, response: dict) -> Optional[str]:
+        """
+        Log the outcome of an escalation send
+        
+        Args:
+            reminder_data: Daily reminder data from database
+            escalation_message: Message that was sent
+            response: Green API response for the send
+        
+        Returns:
+            The message if sent successfully, None otherwise
+        """
         try:
             customer_phone = reminder_data['phone_number']
             escalation_level = reminder_data['escalation_level'] + 1
-            customer_name = reminder_data.get('customer_name')
-            
-            print(f"🚨 Sending escalation level {escalation_level} to {customer_phone}")
-            
-            # Generate escalation message
-            escalation_message = self.generate_escalation_message(escalation_level, customer_name)
-            
-            # Send via WhatsApp
-            response = self.green_api.send_message(
-                phone=customer_phone,
-                message=escalation_message
-            )
             
             if 'error' not in response:
-                print(f"✅ Escalation level {escalation_level} sent successfully to {customer_phone}")
-                return True
+                logger.info("✅ Escalation level %s sent successfully to %s", escalation_level, customer_phone)
+                return escalation_message
             else:
-                print(f"❌ Failed to send escalation to {customer_phone}: {response['error']}")
-                return False
+                logger.error("❌ Failed to send escalation to %s: %s", customer_phone, response['error'])
+                return None
                 
         except Exception as e:
-            print(f"❌ Error sending escalation: {e}")
-            return False
+            logger.error("❌ Error sending escalation: %s", e)
+            return None
     
-    def calculate_next_escalation_time(self, current_time: datetime, escalation_level: int) -> str:
+    def calculate_next_escalation_time(self, current_time: datetime, escalation_level: int) -> datetime:
         """
         Calculate when the next escalation should be sent
         
@@ -155,12 +374,11 @@ class EscalationLogic:
             escalation_level: Current escalation level
             
         Returns:
-            Next escalation time as ISO string
+            Next escalation time, bound directly as a query parameter
         """
-        # Each escalation is 30 minutes apart
-        next_time = current_time + timedelta(minutes=30)
-        # Return format compatible with MySQL STR_TO_DATE function
-        return next_time.strftime('%Y-%m-%d %H:%M:%S')
+        # Each escalation is 30 minutes apart. Whole seconds keep the stored
+        # value in the 'YYYY-MM-DD HH:MM:SS' format the escalation queries compare.
+        return (current_time + timedelta(minutes=30)).replace(microsecond=0)
     
     def should_stop_escalating(self, reminder_data: dict) -> bool:
         """
@@ -177,15 +395,19 @@ class EscalationLogic:
             return True
         
         # Stop if max escalation level reached (4 escalations + initial = 5 total)
-        if reminder_data.get('escalation_level', 0) >= 4:
+        if reminder_data.get('escalation_level', 0) >= MAX_ESCALATION_LEVEL:
             return True
         
         # Stop if more than 2 hours have passed since initial reminder
-        created_at = datetime.fromisoformat(reminder_data['created_at'])
-        current_time = datetime.now(self.utc_tz)
-        time_diff = (current_time - created_at).total_seconds() / 3600
+        # MySQL already returns a datetime; only parse when given a string
+        created_at = reminder_data['created_at']
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            # TIMESTAMP columns come back naive, in the server's UTC time
+            created_at = created_at.replace(tzinfo=UTC)
         
-        if time_diff > 2:
+        if datetime.now(UTC) - created_at > MAX_ESCALATION_WINDOW:
             return True
         
         return False 
\ No newline at end of file
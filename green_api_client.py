@@ -1,8 +1,40 @@
+import logging
 import requests
-import json
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from config import Config
+import json_utils
+
+logger = logging.getLogger(__name__)
+
+# Retry policy for transient Green API failures (connection errors, timeouts,
+# rate limiting and server errors)
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_MAX_BACKOFF_SECONDS = 8
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Only these methods are safe to re-send after the server may have acted on
+# them; other methods (SendMessage is a POST) are only retried on 429 or when
+# the connection failed before the request was sent, so messages aren't duplicated
+IDEMPOTENT_METHODS = {'GET', 'DELETE'}
+
+# Default request timeout in seconds (connect, read)
+REQUEST_TIMEOUT = (5, 15)
+
+# Maximum number of DeleteNotification requests in flight at once
+NOTIFICATION_DELETE_WORKERS = 8
+
+# Maximum number of SendMessage requests in flight at once
+MESSAGE_SEND_WORKERS = 8
+
+# One session for all clients so TCP/TLS connections to Green API are reused,
+# with enough pooled connections for the concurrent senders
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_maxsize=max(MESSAGE_SEND_WORKERS, NOTIFICATION_DELETE_WORKERS)))
 
 class GreenAPIClient:
     def __init__(self):
@@ -23,12 +55,60 @@ class GreenAPIClient:
         """Build full API URL"""
         return f"{self.base_url}/{endpoint}"
     
+    @staticmethod
+    def _failed_before_send(error: requests.exceptions.RequestException) -> bool:
+        """Check whether a request failed while connecting, before anything was sent"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        cause = error.args[0] if error.args else None
+        return isinstance(getattr(cause, 'reason', None), NewConnectionError)
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Make an API request, retrying transient failures with exponential backoff
+        
+        GET and DELETE are retried on connection errors, timeouts, 429 and 5xx.
+        Other methods are only retried on 429 or if the connection failed before
+        the request was sent, since the server may already have acted on them.
+        
+        Args:
+            method: HTTP method
+            url: Full API URL
+            **kwargs: Extra arguments passed to requests (timeout defaults to REQUEST_TIMEOUT)
+        
+        Returns:
+            Successful response
+        
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after retrying
+        """
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        idempotent = method in IDEMPOTENT_METHODS
+        retryable_status_codes = RETRYABLE_STATUS_CODES if idempotent else {429}
+        
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            try:
+                response = _session.request(method, url, headers=self._get_headers(), **kwargs)
+                if response.status_code not in retryable_status_codes or attempt == RETRY_ATTEMPTS:
+                    response.raise_for_status()
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == RETRY_ATTEMPTS or not (idempotent or self._failed_before_send(e)):
+                    raise
+                reason = str(e)
+            
+            delay = min(RETRY_MAX_BACKOFF_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            logger.warning("⚠️ Green API %s failed (%s), retrying in %ss (attempt %s/%s)", method, reason, delay, attempt, RETRY_ATTEMPTS)
+            time.sleep(delay)
+    
     def send_message(self, phone: str, message: str) -> Dict:
         """
         Send a WhatsApp message using Green API
         
         Args:
-            phone: Phone number with country code (no +)
+            phone: Phone number with country code (no +), or a full chat ID
+                such as "972501234567@c.us" when the caller already has one
             message: Message text to send
             
         Returns:
@@ -37,52 +117,70 @@ class GreenAPIClient:
         url = self._get_url(f"waInstance{self.instance_id}/SendMessage/{self.token}")
         
         payload = {
-            "chatId": f"{phone}@c.us",
+            "chatId": phone if '@' in phone else f"{phone}@c.us",
             "message": message
         }
         
         try:
-            response = requests.post(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending message: {e}")
+            response = self._request('POST', url, data=json_utils.dumps_bytes(payload))
+            return json_utils.loads(response.content)
+        except (requests.exceptions.RequestException, json_utils.JSONDecodeError) as e:
+            logger.error("Error sending message: %s", e)
             return {"error": str(e)}
     
-    def get_notifications(self) -> List[Dict]:
+    def send_messages(self, messages: List[Tuple[str, str]]) -> List[Dict]:
         """
-        Get incoming notifications/messages using the correct Green API endpoint
+        Send several WhatsApp messages concurrently
+        
+        Args:
+            messages: List of (phone or chat ID, message text) pairs
         
         Returns:
-            List of notification objects
+            List of API responses in the same order as messages; failed sends
+            are returned as {"error": ...} like send_message
         """
-        url = self._get_url(f"waInstance{self.instance_id}/ReceiveNotification/{self.token}")
-        
-        try:
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting notifications: {e}")
+        if not messages:
             return []
+        
+        def send(item: Tuple[str, str]) -> Dict:
+            try:
+                return self.send_message(*item)
+            except Exception as e:
+                logger.error("Error sending message: %s", e)
+                return {"error": str(e)}
+        
+        max_workers = min(MESSAGE_SEND_WORKERS, len(messages))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(send, messages))
     
-    def check_notifications_available(self) -> bool:
+    def get_notifications(self, receive_timeout: Optional[int] = None) -> List[Dict]:
         """
-        Check if there are notifications available to receive
+        Get incoming notifications/messages using the correct Green API endpoint
         
+        Args:
+            receive_timeout: Optional long-poll timeout in seconds (5-60). Green API
+                holds the request open until a notification arrives or the timeout
+                expires, so callers can poll back-to-back without sleeping.
+            
         Returns:
-            True if notifications are available, False otherwise
+            List of notification objects
         """
         url = self._get_url(f"waInstance{self.instance_id}/ReceiveNotification/{self.token}")
+        params = None
+        timeout = REQUEST_TIMEOUT
+        
+        if receive_timeout is not None:
+            receive_timeout = max(5, min(60, receive_timeout))
+            params = {"receiveTimeout": receive_timeout}
+            # Give the server its full window plus some slack before timing out locally
+            timeout = receive_timeout + 5
         
         try:
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            notifications = response.json()
-            return len(notifications) > 0
-        except requests.exceptions.RequestException as e:
-            print(f"Error checking notifications: {e}")
-            return False
+            response = self._request('GET', url, params=params, timeout=timeout)
+            return json_utils.loads(response.content)
+        except (requests.exceptions.RequestException, json_utils.JSONDecodeError) as e:
+            logger.error("Error getting notifications: %s", e)
+            return []
     
     def delete_notification(self, receipt_id: int) -> bool:
         """
@@ -97,13 +195,29 @@ class GreenAPIClient:
         url = self._get_url(f"waInstance{self.instance_id}/DeleteNotification/{self.token}/{receipt_id}")
         
         try:
-            response = requests.delete(url, headers=self._get_headers())
-            response.raise_for_status()
+            self._request('DELETE', url)
             return True
         except requests.exceptions.RequestException as e:
-            print(f"Error deleting notification: {e}")
+            logger.error("Error deleting notification: %s", e)
             return False
     
+    def delete_notifications(self, receipt_ids: List[int]) -> List[bool]:
+        """
+        Delete several notifications concurrently after a poll cycle
+        
+        Args:
+            receipt_ids: IDs of the notifications to delete
+            
+        Returns:
+            List of results (True if deleted) in the same order as receipt_ids
+        """
+        if not receipt_ids:
+            return []
+        
+        max_workers = min(NOTIFICATION_DELETE_WORKERS, len(receipt_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.delete_notification, receipt_ids))
+    
     def get_state_instance(self) -> Dict:
         """
         Get the current state of the WhatsApp instance
@@ -114,11 +228,10 @@ class GreenAPIClient:
         url = self._get_url(f"waInstance{self.instance_id}/getStateInstance/{self.token}")
         
         try:
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting instance state: {e}")
+            response = self._request('GET', url)
+            return json_utils.loads(response.content)
+        except (requests.exceptions.RequestException, json_utils.JSONDecodeError) as e:
+            logger.error("Error getting instance state: %s", e)
             return {"error": str(e)}
     
     def is_instance_authorized(self) -> bool:
@@ -132,7 +245,7 @@ class GreenAPIClient:
             state = self.get_state_instance()
             return state.get('stateInstance') == 'authorized'
         except Exception as e:
-            print(f"Error checking instance authorization: {e}")
+            logger.error("Error checking instance authorization: %s", e)
             return False
     
     def set_webhook_url(self, webhook_url: str) -> Dict:
@@ -155,11 +268,10 @@ class GreenAPIClient:
         }
         
         try:
-            response = requests.post(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error setting webhook URL: {e}")
+            response = self._request('POST', url, data=json_utils.dumps_bytes(payload))
+            return json_utils.loads(response.content)
+        except (requests.exceptions.RequestException, json_utils.JSONDecodeError) as e:
+            logger.error("Error setting webhook URL: %s", e)
             return {"error": str(e)}
     
     def get_webhook_settings(self) -> Dict:
@@ -172,11 +284,10 @@ class GreenAPIClient:
         url = self._get_url(f"waInstance{self.instance_id}/GetSettings/{self.token}")
         
         try:
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting webhook settings: {e}")
+            response = self._request('GET', url)
+            return json_utils.loads(response.content)
+        except (requests.exceptions.RequestException, json_utils.JSONDecodeError) as e:
+            logger.error("Error getting webhook settings: %s", e)
             return {"error": str(e)}
     
     def delete_webhook_url(self) -> Dict:
@@ -193,9 +304,8 @@ class GreenAPIClient:
         }
         
         try:
-            response = requests.post(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error deleting webhook URL: {e}")
+            response = self._request('POST', url, data=json_utils.dumps_bytes(payload))
+            return json_utils.loads(response.content)
+        except (requests.exceptions.RequestException, json_utils.JSONDecodeError) as e:
+            logger.error("Error deleting webhook URL: %s", e)
             return {"error": str(e)} 
\ No newline at end of file
@@ -0,0 +1,61 @@
+import json
+from typing import Any, Union
+
+# orjson is a much faster C implementation; fall back to the stdlib when it
+# isn't installed so nothing breaks in minimal environments
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The one error loads() raises for invalid JSON (orjson's error subclasses it)
+JSONDecodeError = json.JSONDecodeError
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON
+    
+    Args:
+        obj: Object to serialize (unknown types are converted with str())
+        indent: Pretty-print with 2-space indentation
+        
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(obj, ensure_ascii=False, default=str, indent=2 if indent else None).encode('utf-8')
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize an object to a JSON string
+    
+    Args:
+        obj: Object to serialize (unknown types are converted with str())
+        
+    Returns:
+        JSON document as str
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document
+    
+    Args:
+        data: JSON as bytes or str
+        
+    Returns:
+        Parsed object
+    
+    Raises:
+        JSONDecodeError: If data is not valid JSON (including an empty body)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
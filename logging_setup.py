@@ -0,0 +1,35 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from config import Config
+
+_listener = None
+
+def configure_logging():
+    """
+    Configure root logging to go through a background queue listener
+    
+    Request threads only put records on an in-memory queue; a single listener
+    thread does the actual (blocking) write to stdout. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    
+    log_queue = queue.Queue(-1)
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    
+    root = logging.getLogger()
+    root.setLevel(Config.LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+    
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    
+    # Flush anything still queued when the process exits
+    atexit.register(_listener.stop)
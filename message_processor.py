@@ -1,25 +1,183 @@
-import json
+import atexit
+import logging
+import queue
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
-from openai import OpenAI
+from typing import BinaryIO, Dict, Iterable, List, Optional
+from cachetools import TTLCache
+from openai_client import get_openai_client
 from config import Config
 from database import Database
 from confirmation_ai import ConfirmationAI
+import json_utils
+import msgpack
 import os
 
+logger = logging.getLogger(__name__)
+
+# Message history backups are MessagePack; .json files are still read and written
+# for compatibility with backups made before the switch
+MESSAGE_HISTORY_FILE = 'message_history.msgpack'
+LEGACY_MESSAGE_HISTORY_FILE = 'message_history.json'
+
+# Message statistics are loaded from the database and then updated in memory as
+# messages are processed; reload periodically to pick up writes from elsewhere
+STATS_CACHE_TTL_SECONDS = 60
+
+# AI replies don't depend on the sender or history, so replies to repeated
+# messages ("yes", "לקחתי", ...) are reused instead of calling the model again
+AI_RESPONSE_CACHE_SIZE = 1024
+AI_RESPONSE_CACHE_TTL_SECONDS = 3600
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Processed messages are written to the database by a background thread, in
+# batches of up to this many records per transaction
+MESSAGE_WRITE_BATCH_SIZE = 50
+
+# Maximum number of messages waiting to be written; further messages are
+# dropped (and logged) rather than growing memory if the database falls behind
+MESSAGE_WRITE_QUEUE_SIZE = 1000
+
+
+@dataclass(slots=True)
+class MessageRecord:
+    """A processed message, as stored in the messages table"""
+    sender: str
+    message: str
+    timestamp: str
+    action: str = ''
+    ai_processed: bool = False
+    response: str = ''
+    
+    def as_row(self) -> tuple:
+        """Column values in messages-table insert order"""
+        return (self.sender, self.message, self.timestamp, self.action, self.ai_processed, self.response)
+
+# System prompt for free-form replies
+_SYSTEM_PROMPT = """אתה עוזר אישי ידידותי לתזכורות גלולת מניעת הריון. התפקיד שלך הוא לעזור למשתמשות לנהל את הגלולה היומית שלהן.
+
+תפקידים עיקריים:
+- לאשר כשהמשתמשות לקחו את הגלולה
+- לספק עידוד ותמיכה
+- לטפל במינונים שהוחמצו בזהירות ודחיפות
+- לענות על שאלות בנוגע לניהול הגלולה
+- להיות אמפתי ומתמקד בבריאות
+
+פעולות זמינות:
+- 'לקחתי'/'כן' - המשתמשת מאשרת שלקחה את הגלולה
+- 'החמצתי'/'לא' - המשתמשת החמיצה את המינון
+- 'עזרה' - המשתמשת צריכה עזרה
+- תגובות אחרות - לטפל באופן טבעי עם AI
+
+שמור על תגובות:
+- ידידותיות ותומכות
+- פחות מ-200 תווים
+- כולל אימוג'ים רלוונטיים
+- מתמקד בבריאות ורווחה
+- באותה שפה כמו הודעת המשתמשת
+
+הקשר: זהו מערכת תזכורות יומיות לגלולה בשעה 8:00 בערב."""
+
+# Maps message actions to their statistics keys
+_ACTION_STAT_KEYS = {
+    'pill_confirmed': 'pill_confirmed',
+    'pill_missed': 'pill_missed',
+    'help_requested': 'help_requests',
+    'unknown_command': 'unknown_commands'
+}
+
+def _write_message_history(messages: Iterable[Dict], f: BinaryIO, filename: str) -> int:
+    """
+    Stream message history to an open file one record at a time, in the format
+    implied by the file extension, without building the whole document in memory
+    
+    Returns:
+        Number of messages written
+    """
+    count = 0
+    if filename.endswith('.json'):
+        f.write(b'[')
+        for message in messages:
+            f.write(b',\n' if count else b'\n')
+            f.write(json_utils.dumps_bytes(message))
+            count += 1
+        f.write(b'\n]')
+    else:
+        # A MessagePack backup is a stream of consecutive message objects
+        packer = msgpack.Packer(use_bin_type=True, default=str)
+        for message in messages:
+            f.write(packer.pack(message))
+            count += 1
+    return count
+
+def _read_message_history(f: BinaryIO, filename: str) -> List[Dict]:
+    """Read message history in the format implied by the file extension"""
+    if filename.endswith('.json'):
+        return json_utils.loads(f.read())
+    
+    messages = []
+    for item in msgpack.Unpacker(f, raw=False):
+        # Older backups hold all messages in a single array
+        if isinstance(item, list):
+            messages.extend(item)
+        else:
+            messages.append(item)
+    return messages
+
+def _compile_patterns(patterns: List[str]) -> re.Pattern:
+    """Compile substring patterns into one alternation regex"""
+    return re.compile('|'.join(re.escape(pattern) for pattern in patterns))
+
 class MessageProcessor:
+    # Intent classification: substring patterns (Hebrew and English), one regex per intent
+    _CONFIRM_RE = _compile_patterns(['taken', 'yes', 'done', 'ok', '✅', 'took', 'taken it', 'swallowed', 'consumed',
+                                     'לקחתי', 'כן', 'סיימתי', 'אוקיי', 'לקחת', 'בלעתי', 'גמרתי'])
+    _MISSED_RE = _compile_patterns(['missed', 'no', 'forgot', '❌', 'didn\'t', 'havent', 'haven\'t', 'forgotten',
+                                    'החמצתי', 'לא', 'שכחתי', 'לא לקחתי', 'לא לקחת', 'שכחת'])
+    _HELP_RE = _compile_patterns(['help', 'commands', '?', 'what', 'how', 'assist', 'support',
+                                  'עזרה', 'פקודות', 'מה', 'איך', 'תעזור', 'תמיכה', 'מה זה'])
+    
+    # Template fallback: exact replies
+    _CONFIRM_REPLIES = frozenset(['taken', 'yes', 'done', 'ok', '✅', 'לקחתי', 'כן', 'סיימתי', 'אוקיי'])
+    _MISSED_REPLIES = frozenset(['missed', 'no', 'forgot', '❌', 'החמצתי', 'לא', 'שכחתי'])
+    _HELP_REPLIES = frozenset(['help', 'commands', '?', 'what', 'עזרה', 'פקודות', 'מה'])
+    
     def __init__(self):
         try:
             self.db = Database()
         except Exception as e:
-            print(f"❌ Failed to initialize database: {e}")
+            logger.error("❌ Failed to initialize database: %s", e)
             self.db = None
             
         try:
             self.confirmation_ai = ConfirmationAI()
         except Exception as e:
-            print(f"❌ Failed to initialize confirmation AI: {e}")
+            logger.error("❌ Failed to initialize confirmation AI: %s", e)
             self.confirmation_ai = None
+        
+        self._stats_cache: Optional[Counter] = None
+        self._stats_loaded_at = 0.0
+        self._stats_lock = threading.Lock()
+        
+        self._ai_response_cache = TTLCache(maxsize=AI_RESPONSE_CACHE_SIZE, ttl=AI_RESPONSE_CACHE_TTL_SECONDS)
+        self._ai_cache_lock = threading.Lock()
+        
+        # Recently processed messages in this process (bounded; the database holds the full history)
+        self.processed_messages = deque(maxlen=Config.MAX_IN_MEMORY_HISTORY)
+        
+        # Write-behind queue so message saves don't block the webhook response
+        self._write_queue = queue.Queue(maxsize=MESSAGE_WRITE_QUEUE_SIZE)
+        self._writer_thread = None
+        if self.db is not None:
+            self._writer_thread = threading.Thread(target=self._write_behind_loop, name='message-writer', daemon=True)
+            self._writer_thread.start()
+            atexit.register(self.close)
+        
         self.response_templates = {
             "confirm": "מעולה! רשמתי שלקחת את הגלולה. תישארי בריאה! 💪",
             "missed": "אל דאגה! קחי אותה בהקדם האפשרי. הבריאות שלך חשובה! 🏥",
@@ -30,13 +188,11 @@ class MessageProcessor:
         # Initialize OpenAI if enabled
         if Config.OPENAI_ENABLED and Config.OPENAI_API_KEY:
             self.openai_enabled = True
-            self.client = OpenAI(
-                api_key=os.environ.get("OPENAI_API_KEY")
-            )
-            print("🤖 OpenAI integration enabled")
+            self.client = get_openai_client()
+            logger.info("🤖 OpenAI integration enabled")
         else:
             self.openai_enabled = False
-            print("🤖 OpenAI integration disabled - using template responses")
+            logger.info("🤖 OpenAI integration disabled - using template responses")
     
     def _get_ai_response(self, message_body: str, sender: str) -> Optional[str]:
         """
@@ -51,132 +207,126 @@ class MessageProcessor:
         """
         if not self.openai_enabled:
             return None
+        
+        cache_key = (Config.OPENAI_MODEL, _WHITESPACE_RE.sub(' ', message_body.casefold().strip()))
+        with self._ai_cache_lock:
+            cached_response = self._ai_response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.debug("🤖 AI Response (cached): %s", cached_response)
+            return cached_response
             
         try:
-            system_prompt = """אתה עוזר אישי ידידותי לתזכורות גלולת מניעת הריון. התפקיד שלך הוא לעזור למשתמשות לנהל את הגלולה היומית שלהן.
-
-תפקידים עיקריים:
-- לאשר כשהמשתמשות לקחו את הגלולה
-- לספק עידוד ותמיכה
-- לטפל במינונים שהוחמצו בזהירות ודחיפות
-- לענות על שאלות בנוגע לניהול הגלולה
-- להיות אמפתי ומתמקד בבריאות
-
-פעולות זמינות:
-- 'לקחתי'/'כן' - המשתמשת מאשרת שלקחה את הגלולה
-- 'החמצתי'/'לא' - המשתמשת החמיצה את המינון
-- 'עזרה' - המשתמשת צריכה עזרה
-- תגובות אחרות - לטפל באופן טבעי עם AI
-
-שמור על תגובות:
-- ידידותיות ותומכות
-- פחות מ-200 תווים
-- כולל אימוג'ים רלוונטיים
-- מתמקד בבריאות ורווחה
-- באותה שפה כמו הודעת המשתמשת
-
-הקשר: זהו מערכת תזכורות יומיות לגלולה בשעה 8:00 בערב."""
-
             response = self.client.responses.create(
                 model=Config.OPENAI_MODEL,
-                instructions=system_prompt,
+                instructions=_SYSTEM_PROMPT,
                 input=message_body,
             )
 
             ai_response = response.output_text.strip()
-            print(f"🤖 AI Response: {ai_response}")
+            logger.debug("🤖 AI Response: %s", ai_response)
+            
+            if ai_response:
+                with self._ai_cache_lock:
+                    self._ai_response_cache[cache_key] = ai_response
             return ai_response
             
         except Exception as e:
-            print(f"❌ OpenAI API error: {e}")
+            logger.error("❌ OpenAI API error: %s", e)
             return None
     
-    def _classify_message_intent(self, message_body: str) -> str:
+    def _classify_message_intent(self, message_lower: str) -> str:
         """
         Classify the intent of the message for statistics
         
         Args:
-            message_body: The user's message
-            
+            message_lower: The user's message, already normalized (casefolded, stripped)
+        
         Returns:
             Intent classification
         """
-        message_lower = message_body.lower().strip()
-        
         # Check for confirmation patterns (Hebrew and English)
-        confirm_patterns = ['taken', 'yes', 'done', 'ok', '✅', 'took', 'taken it', 'swallowed', 'consumed',
-                           'לקחתי', 'כן', 'סיימתי', 'אוקיי', 'לקחת', 'בלעתי', 'גמרתי']
-        if any(pattern in message_lower for pattern in confirm_patterns):
+        if self._CONFIRM_RE.search(message_lower):
             return 'pill_confirmed'
         
         # Check for missed patterns (Hebrew and English)
-        missed_patterns = ['missed', 'no', 'forgot', '❌', 'didn\'t', 'havent', 'haven\'t', 'forgotten',
-                          'החמצתי', 'לא', 'שכחתי', 'לא לקחתי', 'לא לקחת', 'שכחת']
-        if any(pattern in message_lower for pattern in missed_patterns):
+        if self._MISSED_RE.search(message_lower):
             return 'pill_missed'
         
         # Check for help patterns (Hebrew and English)
-        help_patterns = ['help', 'commands', '?', 'what', 'how', 'assist', 'support',
-                        'עזרה', 'פקודות', 'מה', 'איך', 'תעזור', 'תמיכה', 'מה זה']
-        if any(pattern in message_lower for pattern in help_patterns):
+        if self._HELP_RE.search(message_lower):
             return 'help_requested'
         
         return 'unknown_command'
     
-    def _process_confirmation(self, message_body: str, sender: str) -> Optional[str]:
+    def _process_confirmation(self, message_body: str, sender: str, today: str) -> Optional[str]:
         """
         Process a message as a potential confirmation of taking the pill
         
         Args:
             message_body: The user's message
             sender: The sender's phone number
+            today: Today's date in YYYY-MM-DD format (UTC)
             
         Returns:
             Response message if this was a confirmation, None otherwise
         """
         try:
-            # Get customer by phone number
-            customer = self.db.get_customer_by_phone(sender)
-            if not customer:
-                print(f"📱 No customer found for phone number: {sender}")
-                return None
+            # Get the customer and today's daily reminder in one query
+            customer_reminder = self.db.get_customer_and_daily_reminder(sender, today)
             
-            # Check if there's a pending daily reminder for today
-            today = datetime.now(timezone.utc).date().isoformat()
-            daily_reminder = self.db.get_daily_reminder(customer['id'], today)
+            if not customer_reminder:
+                logger.debug("📱 No customer found for phone number: %s", sender)
+                return None
             
-            if not daily_reminder:
-                print(f"📱 No pending reminder found for {sender} on {today}")
+            if customer_reminder['daily_reminder_id'] is None:
+                logger.debug("📱 No pending reminder found for %s on %s", sender, today)
                 return None
             
-            if daily_reminder['confirmed']:
-                print(f"📱 Reminder already confirmed for {sender} on {today}")
+            if customer_reminder['confirmed']:
+                logger.debug("📱 Reminder already confirmed for %s on %s", sender, today)
                 return None
             
             # Use AI to analyze the confirmation
             confirmed, response_message = self.confirmation_ai.analyze_confirmation(message_body, sender)
             
-            # Update the daily reminder with confirmation status
-            self.db.update_daily_reminder_confirmation(
-                customer_id=customer['id'],
+            # Update the daily reminder with confirmation status (also stops escalations if confirmed)
+            self.db.confirm_daily_reminder(
+                customer_id=customer_reminder['customer_id'],
                 reminder_date=today,
                 confirmed=confirmed,
                 confirmation_message=message_body
             )
             
-            # Stop escalations if user confirmed
             if confirmed:
-                self.db.stop_escalations_for_customer(customer['id'], today)
-                print(f"✅ Confirmation recorded for {sender} on {today} - escalations stopped")
+                logger.info("✅ Confirmation recorded for %s on %s - escalations stopped", sender, today)
             else:
-                print(f"❌ Missed pill recorded for {sender} on {today}")
+                logger.info("❌ Missed pill recorded for %s on %s", sender, today)
             
             return response_message
             
         except Exception as e:
-            print(f"❌ Error processing confirmation: {e}")
+            logger.error("❌ Error processing confirmation: %s", e)
             return None
     
+    def _template_response(self, message_lower: str) -> Optional[str]:
+        """
+        Get the template reply for an exact canned message
+        
+        Args:
+            message_lower: Normalized (casefolded, stripped) message
+            
+        Returns:
+            Template response, or None if the message isn't a canned reply
+        """
+        # Check Hebrew and English patterns
+        if message_lower in self._CONFIRM_REPLIES:
+            return self.response_templates['confirm']
+        if message_lower in self._MISSED_REPLIES:
+            return self.response_templates['missed']
+        if message_lower in self._HELP_REPLIES:
+            return self.response_templates['help']
+        return None
+    
     def process_message(self, message_data: Dict) -> Optional[str]:
         """
         Process incoming message and return appropriate response
@@ -193,57 +343,108 @@ class MessageProcessor:
                 return None
             
             message_body = message_data['body'].strip()
-            sender = message_data.get('senderData', {}).get('chatId', '').split('@')[0]
-            timestamp = datetime.now(timezone.utc).isoformat()
+            # Normalize once; the template and intent checks all share it
+            message_lower = message_body.casefold()
+            sender = message_data.get('senderData', {}).get('chatId', '').partition('@')[0]
+            now = datetime.now(timezone.utc)
+            timestamp = now.isoformat()
+            today = now.date().isoformat()
             
-            # Create message record
-            message_record = {
-                'sender': sender,
-                'message': message_body,
-                'timestamp': timestamp,
-                'processed': True
-            }
+            # Create message record; fields are filled in as the message is handled
+            message_record = MessageRecord(sender, message_body, timestamp)
             
             # Check if this is a confirmation message
-            confirmation_result = self._process_confirmation(message_body, sender)
+            confirmation_result = self._process_confirmation(message_body, sender, today)
             if confirmation_result:
                 response = confirmation_result
-                message_record['action'] = 'confirmation_processed'
+                message_record.action = 'confirmation_processed'
             else:
-                # Try AI processing first if enabled
-                response = None
-                if self.openai_enabled:
+                # Canned replies are answered from templates without calling the AI
+                response = self._template_response(message_lower)
+                
+                # Use AI for anything else if enabled
+                if response is None and self.openai_enabled:
                     response = self._get_ai_response(message_body, sender)
+                    message_record.ai_processed = bool(response)
                 
-                # Fallback to template-based processing if AI fails or is disabled
+                # Fallback if AI fails or is disabled
                 if not response:
-                    message_lower = message_body.lower().strip()
-                    
-                    # Check Hebrew and English patterns
-                    if message_lower in ['taken', 'yes', 'done', 'ok', '✅', 'לקחתי', 'כן', 'סיימתי', 'אוקיי']:
-                        response = self.response_templates['confirm']
-                    elif message_lower in ['missed', 'no', 'forgot', '❌', 'החמצתי', 'לא', 'שכחתי']:
-                        response = self.response_templates['missed']
-                    elif message_lower in ['help', 'commands', '?', 'what', 'עזרה', 'פקודות', 'מה']:
-                        response = self.response_templates['help']
-                    else:
-                        response = self.response_templates['unknown']
+                    response = self.response_templates['unknown']
                 
                 # Classify the message intent for statistics
-                message_record['action'] = self._classify_message_intent(message_body)
-            
-            message_record['ai_processed'] = self.openai_enabled and response != self.response_templates.get('unknown')
+                message_record.action = self._classify_message_intent(message_lower)
             
             # Store processed message in database
-            message_record['response'] = response
-            self.db.save_message(message_record)
+            message_record.response = response
+            self.processed_messages.append(message_record)
+            # Only count messages that are on their way to the database, so the
+            # cached statistics match what the stats ETag validates against
+            if self._queue_message_write(message_record):
+                self._record_statistics(message_record.action, message_record.ai_processed)
             
             return response
             
         except Exception as e:
-            print(f"Error processing message: {e}")
+            logger.error("Error processing message: %s", e)
             return "Sorry, I encountered an error processing your message. Please try again."
     
+    def _queue_message_write(self, message_record: MessageRecord) -> bool:
+        """
+        Queue a processed message for the background writer, if there is a database
+        
+        Args:
+            message_record: Processed message to save
+        
+        Returns:
+            True if the message was queued, False if it won't be saved
+        """
+        if self._writer_thread is None:
+            return False
+        try:
+            self._write_queue.put_nowait(message_record)
+            return True
+        except queue.Full:
+            logger.warning("⚠️ Message write queue full, not saving message from %s", message_record.sender)
+            return False
+    
+    def _write_behind_loop(self):
+        """Background loop that saves queued messages in batched transactions"""
+        running = True
+        while running:
+            batch = [self._write_queue.get()]
+            while len(batch) < MESSAGE_WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            # None is the shutdown sentinel put by close()
+            if None in batch:
+                running = False
+            records = [record for record in batch if record is not None]
+            
+            try:
+                if records:
+                    self.db.save_message_rows([record.as_row() for record in records])
+            except Exception as e:
+                logger.error("❌ Error saving %s queued messages: %s", len(records), e)
+                # These messages were already counted; reload the stats from the database
+                self.invalidate_statistics()
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def flush(self):
+        """Block until all queued messages have been written to the database"""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._write_queue.join()
+    
+    def close(self):
+        """Flush queued messages and stop the background writer"""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join(timeout=10)
+    
     def get_message_history(self, limit: int = 10) -> List[Dict]:
         """
         Get recent message history
@@ -263,34 +464,92 @@ class MessageProcessor:
         Returns:
             Dictionary with statistics
         """
-        stats = self.db.get_statistics()
+        with self._stats_lock:
+            if self._stats_cache is None or time.monotonic() - self._stats_loaded_at > STATS_CACHE_TTL_SECONDS:
+                self._stats_cache = Counter(self.db.get_statistics())
+                self._stats_loaded_at = time.monotonic()
+            stats = dict(self._stats_cache)
+        
         stats['ai_enabled'] = self.openai_enabled
         return stats
     
-    def save_messages_to_file(self, filename: str = 'message_history.json'):
-        """Save processed messages to a JSON file (legacy method for backup)"""
+    def get_statistics_version(self) -> str:
+        """
+        Get a cheap version string for the statistics, for HTTP ETags
+        
+        Includes the messages still waiting in the write queue, since those are
+        already counted in the cached statistics.
+        
+        Returns:
+            Version string that changes whenever the statistics change
+        """
+        return f"{self.db.get_messages_version()}-{self._write_queue.qsize()}-{int(self.openai_enabled)}"
+    
+    def _record_statistics(self, action: str, ai_processed: bool):
+        """Update cached statistics for a newly saved message"""
+        with self._stats_lock:
+            if self._stats_cache is None:
+                return
+            self._stats_cache['total_messages'] += 1
+            if action in _ACTION_STAT_KEYS:
+                self._stats_cache[_ACTION_STAT_KEYS[action]] += 1
+            if ai_processed:
+                self._stats_cache['ai_processed'] += 1
+    
+    def invalidate_statistics(self):
+        """Drop cached statistics so the next call reloads them from the database"""
+        with self._stats_lock:
+            self._stats_cache = None
+    
+    def save_messages_to_file(self, filename: str = MESSAGE_HISTORY_FILE):
+        """Save processed messages to a MessagePack (or .json) file (legacy method for backup)"""
         try:
-            messages = self.db.get_message_history(1000)  # Get last 1000 messages
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(messages, f, indent=2, ensure_ascii=False)
-            print(f"Message history backup saved to {filename}")
+            with open(filename, 'wb') as f:
+                # Stream the last 1000 messages straight from the cursor to the file
+                count = _write_message_history(self.db.iter_message_history(1000), f, filename)
+            logger.info("Message history backup saved to %s (%s messages)", filename, count)
         except Exception as e:
-            print(f"Error saving message history backup: {e}")
+            logger.error("Error saving message history backup: %s", e)
     
-    def load_messages_from_file(self, filename: str = 'message_history.json'):
-        """Load processed messages from a JSON file (legacy method for migration)"""
+    def load_messages_from_file(self, filename: Optional[str] = None):
+        """Load processed messages from a MessagePack or JSON file (legacy method for migration)"""
+        if filename is None:
+            filename = MESSAGE_HISTORY_FILE
+            # Fall back to a backup written before the MessagePack switch
+            if not os.path.exists(filename) and os.path.exists(LEGACY_MESSAGE_HISTORY_FILE):
+                filename = LEGACY_MESSAGE_HISTORY_FILE
+        
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                messages = json.load(f)
+            with open(filename, 'rb') as f:
+                messages = _read_message_history(f, filename)
             
-            # Migrate old messages to database
-            for message in messages:
-                if 'response' not in message:
-                    message['response'] = ''
-                self.db.save_message(message)
+            # Migrate old messages to database in one transaction
+            self.db.save_messages_bulk(messages)
+            self.invalidate_statistics()
             
-            print(f"Migrated {len(messages)} messages from {filename} to database")
+            logger.info("Migrated %s messages from %s to database", len(messages), filename)
         except FileNotFoundError:
-            print(f"Message history file {filename} not found. Starting with empty database.")
+            logger.info("Message history file %s not found. Starting with empty database.", filename)
         except Exception as e:
-            print(f"Error migrating message history: {e}") 
\ No newline at end of file
+            logger.error("Error migrating message history: %s", e)
+    
+    def convert_json_backup_to_msgpack(self, json_filename: str = LEGACY_MESSAGE_HISTORY_FILE,
+                                       msgpack_filename: str = MESSAGE_HISTORY_FILE) -> int:
+        """
+        One-shot conversion of an old JSON history backup to MessagePack
+        
+        Args:
+            json_filename: Existing JSON backup
+            msgpack_filename: MessagePack file to write
+            
+        Returns:
+            Number of messages converted
+        """
+        with open(json_filename, 'rb') as f:
+            messages = json_utils.loads(f.read())
+        
+        with open(msgpack_filename, 'wb') as f:
+            _write_message_history(messages, f, msgpack_filename)
+        
+        logger.info("Converted %s messages from %s to %s", len(messages), json_filename, msgpack_filename)
+        return len(messages)
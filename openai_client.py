@@ -0,0 +1,49 @@
+import atexit
+import threading
+from typing import Optional
+
+import httpx
+from openai import OpenAI
+
+from config import Config
+
+_client: Optional[OpenAI] = None
+_http_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+def get_openai_client() -> OpenAI:
+    """
+    Get the process-wide OpenAI client, creating it on first use
+    
+    All AI features share one client so they also share one HTTP/2 keepalive
+    pool instead of each opening (and TLS-handshaking) their own connections.
+    
+    Returns:
+        Shared OpenAI client
+    """
+    global _client, _http_client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _http_client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=20,
+                        max_connections=20,
+                        keepalive_expiry=60.0
+                    ),
+                    # Keep this short so a hung call doesn't stall the webhook handler
+                    timeout=httpx.Timeout(Config.OPENAI_TIMEOUT_SECONDS, connect=3.0)
+                )
+                _client = OpenAI(api_key=Config.OPENAI_API_KEY, http_client=_http_client)
+                atexit.register(close_openai_client)
+    return _client
+
+def close_openai_client():
+    """Close the shared client's connection pool (called automatically at exit)"""
+    global _client, _http_client
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _client = None
+        _http_client = None
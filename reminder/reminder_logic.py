@@ -1,59 +1,125 @@
-import os
-import sys
-import requests
-from datetime import datetime, time, timedelta, timezone
-import pytz
-from typing import Optional, List
-
-# Add the current directory to Python path to import our modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, List
 
 from config import Config
 from green_api_client import GreenAPIClient
-from openai import OpenAI
+from openai_client import get_openai_client
 from database import Database
 
+logger = logging.getLogger(__name__)
+
+# Scheduled time checked by the legacy single-reminder path, as minutes after
+# midnight UTC (Config.REMINDER_TIME, parsed once at import)
+_legacy_hour, _legacy_minute = map(int, Config.REMINDER_TIME.split(':'))
+LEGACY_REMINDER_MINUTE_OF_DAY = _legacy_hour * 60 + _legacy_minute
+
+# Daily reminder messages are generated in one OpenAI call per day (n choices)
+# and shared by every reminder time; the system prompt stays byte-identical so
+# the API can reuse its prompt cache
+REMINDER_POOL_SIZE = 5
+
+# Reminders are "2-3 sentences max"; a tighter cap shortens generation time
+REMINDER_MAX_TOKENS = 100
+
+# A tick that sees a reminder time coming up within this many minutes generates
+# the day's messages in the background, so the send itself doesn't wait on OpenAI
+REMINDER_PREFETCH_MINUTES = 30
+
+_REMINDER_SYSTEM_PROMPT = """אתה עוזר אישי מצחיק וסרקסטי ששולח תזכורות יומיות לגלולת מניעת הריון. 
+
+המאפיינים שלך:
+- דובר עברית שוטפת
+- מצחיק וסרקסטי (לא רשמי מדי)
+- מכוון לנשים
+- משתמש באימוג'ים מתאימים
+- מגוון הודעות (לא אותו דבר כל יום)
+- ידידותי אבל עם קצת ציניות
+- תמיד מתייחס לכדור/גלולה (לא "תרופה" או "כדור רפואי")
+
+דוגמאות להודעות:
+- "היי יפה! 🕗 8:00 - זמן לכדור! אל תשכחי שאת לא רוצה להיות בהריון 😅💊"
+- "טאק טאק! 🚪 מי שם? הגלולה שלך! היא מחכה כבר 5 דקות... ⏰💊"
+- "היי! 🎯 זוכרת מה צריך לעשות עכשיו? כן, בדיוק - הכדור! 💊✨"
+- "אוקיי, בואי נספור: 1, 2, 3... הגלולה! 🧮💊 לא, זה לא משחק - זה מניעת הריון! 😂"
+- "היי! 🕐 8:00 - הכדור שלך קורא לך! אל תעשי לו אייבי 💊😅"
+
+כללים:
+- תמיד בעברית
+- תמיד עם אימוג'ים
+- מצחיק וסרקסטי
+- לא רשמי מדי
+- קצר (מקסימום 2-3 משפטים)
+- מגוון - אל תחזור על אותו דבר
+- השתמש במונחים: כדור, גלולה (לא תרופה או כדור רפואי)
+- התייחס למניעת הריון (לא לבריאות כללית)"""
+
+_REMINDER_USER_PROMPT = "צור תזכורת יומית לגלולת מניעת הריון בשעה 8:00 בערב"
+
+# The request messages never change, so one list is shared by every call
+_REMINDER_MESSAGES = [
+    {"role": "system", "content": _REMINDER_SYSTEM_PROMPT},
+    {"role": "user", "content": _REMINDER_USER_PROMPT}
+]
+
+# UTC date of the last reminder this process sent, so the legacy missed-reminder
+# check doesn't query the database again after a send on the same day
+_last_reminder_sent_date: Optional[date] = None
+
+_reminder_pool: Dict[str, List[str]] = {}
+_reminder_pool_cursor = 0
+_reminder_pool_lock = threading.Lock()
+# Held while a day's messages are loaded or generated, so concurrent misses wait
+# for one fill instead of each calling OpenAI
+_reminder_fill_lock = threading.Lock()
+
 class ReminderLogic:
-    def __init__(self):
+    def __init__(self, db: Database = None):
         self.green_api = GreenAPIClient()
+        # One Database for the whole request; callers can share theirs
+        self.db = db or Database()
         self.utc_tz = timezone.utc  # Use UTC timezone
         
         # Initialize OpenAI if enabled
         if Config.OPENAI_ENABLED and Config.OPENAI_API_KEY:
             self.openai_enabled = True
-            self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-            print("🤖 AI reminder messages enabled")
+            self.client = get_openai_client()
+            logger.info("🤖 AI reminder messages enabled")
         else:
             self.openai_enabled = False
-            print("🤖 AI reminder messages disabled - using default message")
+            logger.info("🤖 AI reminder messages disabled - using default message")
     
     def get_last_reminder_date(self) -> Optional[str]:
-        """Get the last reminder date from database"""
+        """Get the last reminder date, from memory if this process sent one today"""
+        if _last_reminder_sent_date == datetime.now(self.utc_tz).date():
+            return _last_reminder_sent_date.isoformat()
+        
         try:
-            db = Database()
-            return db.get_last_reminder_date()
+            return self.db.get_last_reminder_date()
         except Exception as e:
-            print(f"❌ Error getting last reminder date: {e}")
+            logger.error("❌ Error getting last reminder date: %s", e)
             return None
     
-    def save_reminder_to_database(self, scheduled_time: str, message: str) -> Optional[int]:
-        """Save reminder to database"""
+    def reminder_sent_today(self, today: date) -> bool:
+        """Check if a reminder was sent today, from memory if this process sent it"""
+        if _last_reminder_sent_date == today:
+            return True
+        
         try:
-            db = Database()
-            return db.save_reminder(scheduled_time, message)
+            return self.db.reminder_sent_since(today.isoformat())
         except Exception as e:
-            print(f"❌ Error saving reminder to database: {e}")
-            return None
+            logger.error("❌ Error checking for today's reminder: %s", e)
+            return False
     
-    def mark_reminder_sent_in_database(self, reminder_id: int) -> bool:
-        """Mark reminder as sent in database"""
+    def save_reminder_to_database(self, scheduled_time: str, message: str, sent: bool = False) -> Optional[int]:
+        """Save reminder to database, optionally already marked as sent"""
         try:
-            db = Database()
-            db.mark_reminder_sent(reminder_id)
-            return True
+            return self.db.save_reminder(scheduled_time, message, sent=sent)
         except Exception as e:
-            print(f"❌ Error marking reminder as sent: {e}")
-            return False
+            logger.error("❌ Error saving reminder to database: %s", e)
+            return None
     
     def generate_ai_reminder_message(self) -> str:
         """
@@ -65,52 +131,131 @@ class ReminderLogic:
         if not self.openai_enabled:
             return Config.REMINDER_MESSAGE
         
-        try:
-            system_prompt = """אתה עוזר אישי מצחיק וסרקסטי ששולח תזכורות יומיות לגלולת מניעת הריון. 
-
-המאפיינים שלך:
-- דובר עברית שוטפת
-- מצחיק וסרקסטי (לא רשמי מדי)
-- מכוון לנשים
-- משתמש באימוג'ים מתאימים
-- מגוון הודעות (לא אותו דבר כל יום)
-- ידידותי אבל עם קצת ציניות
-- תמיד מתייחס לכדור/גלולה (לא "תרופה" או "כדור רפואי")
-
-דוגמאות להודעות:
-- "היי יפה! 🕗 8:00 - זמן לכדור! אל תשכחי שאת לא רוצה להיות בהריון 😅💊"
-- "טאק טאק! 🚪 מי שם? הגלולה שלך! היא מחכה כבר 5 דקות... ⏰💊"
-- "היי! 🎯 זוכרת מה צריך לעשות עכשיו? כן, בדיוק - הכדור! 💊✨"
-- "אוקיי, בואי נספור: 1, 2, 3... הגלולה! 🧮💊 לא, זה לא משחק - זה מניעת הריון! 😂"
-- "היי! 🕐 8:00 - הכדור שלך קורא לך! אל תעשי לו אייבי 💊😅"
-
-כללים:
-- תמיד בעברית
-- תמיד עם אימוג'ים
-- מצחיק וסרקסטי
-- לא רשמי מדי
-- קצר (מקסימום 2-3 משפטים)
-- מגוון - אל תחזור על אותו דבר
-- השתמש במונחים: כדור, גלולה (לא תרופה או כדור רפואי)
-- התייחס למניעת הריון (לא לבריאות כללית)"""
-
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": "צור תזכורת יומית לגלולת מניעת הריון בשעה 8:00 בערב"}
-                ],
-                max_tokens=150,
-                temperature=0.8  # Add some creativity
-            )
-
-            ai_message = response.choices[0].message.content.strip()
-            print(f"🤖 AI Generated Reminder: {ai_message}")
-            return ai_message
-            
-        except Exception as e:
-            print(f"❌ OpenAI API error generating reminder: {e}")
+        messages = self._get_daily_reminder_messages(datetime.now(self.utc_tz).date().isoformat())
+        if not messages:
             return Config.REMINDER_MESSAGE
+        
+        # Rotate through the day's messages so each reminder time gets a different one
+        global _reminder_pool_cursor
+        with _reminder_pool_lock:
+            index = _reminder_pool_cursor
+            _reminder_pool_cursor += 1
+        return messages[index % len(messages)]
+    
+    def _get_daily_reminder_messages(self, reminder_date: str) -> List[str]:
+        """
+        Get the AI reminder messages for a date, generating them once per day
+        
+        Messages are kept in memory and in the database, so every reminder time
+        (and a restarted process) reuses one OpenAI call per day.
+        
+        Args:
+            reminder_date: Date in YYYY-MM-DD format (UTC)
+            
+        Returns:
+            List of reminder messages (empty if generation failed)
+        """
+        with _reminder_pool_lock:
+            cached = _reminder_pool.get(reminder_date)
+        if cached:
+            return cached
+        
+        # Single flight: a background prefetch and a send that both miss share one
+        # generation instead of paying for two OpenAI calls
+        with _reminder_fill_lock:
+            with _reminder_pool_lock:
+                cached = _reminder_pool.get(reminder_date)
+            if cached:
+                return cached
+            
+            try:
+                messages = self.db.get_reminder_messages(reminder_date)
+            except Exception as e:
+                logger.warning("⚠️ Error loading cached reminder messages: %s", e)
+                messages = None
+            
+            if not messages:
+                try:
+                    response = self.client.chat.completions.create(
+                        model=Config.OPENAI_MODEL,
+                        messages=_REMINDER_MESSAGES,
+                        max_tokens=REMINDER_MAX_TOKENS,
+                        temperature=0.8,  # Add some creativity
+                        n=REMINDER_POOL_SIZE
+                    )
+                    
+                    messages = [
+                        choice.message.content.strip()
+                        for choice in response.choices
+                        if choice.message.content and choice.message.content.strip()
+                    ]
+                    logger.info("🤖 AI Generated %s reminder messages for %s", len(messages), reminder_date)
+                    
+                except Exception as e:
+                    logger.error("❌ OpenAI API error generating reminder: %s", e)
+                    return []
+                
+                if messages:
+                    try:
+                        self.db.save_reminder_messages(reminder_date, messages)
+                    except Exception as e:
+                        logger.warning("⚠️ Error caching reminder messages: %s", e)
+            
+            if messages:
+                # Keep the previous day too, since a late-evening prefetch fills
+                # tomorrow's pool while today's reminders may still be sent
+                oldest_kept = (date.fromisoformat(reminder_date) - timedelta(days=1)).isoformat()
+                with _reminder_pool_lock:
+                    for pool_date in [d for d in _reminder_pool if d < oldest_kept]:
+                        del _reminder_pool[pool_date]
+                    _reminder_pool[reminder_date] = messages
+            return messages
+    
+    def prefetch_reminder_messages(self, reminder_times: List[str], now: datetime) -> bool:
+        """
+        Generate today's AI reminder messages in the background if a reminder is coming up
+        
+        Args:
+            reminder_times: List of reminder times in HH:MM format
+            now: Current UTC time
+        
+        Returns:
+            True if background generation was started, False otherwise
+        """
+        if not self.openai_enabled:
+            return False
+        
+        current_total_minutes = now.hour * 60 + now.minute
+        reminder_date = None
+        for reminder_time in reminder_times:
+            try:
+                reminder_hour, reminder_minute = map(int, reminder_time.split(':'))
+            except ValueError:
+                continue
+            # Wrap past midnight, so a 00:05 reminder is upcoming at 23:50
+            reminder_total_minutes = reminder_hour * 60 + reminder_minute
+            minutes_until = (reminder_total_minutes - current_total_minutes) % (24 * 60)
+            if 0 < minutes_until <= REMINDER_PREFETCH_MINUTES:
+                # The pool is keyed by the date the reminder will actually be sent on
+                reminder_day = now.date() + timedelta(days=1) if reminder_total_minutes < current_total_minutes else now.date()
+                reminder_date = reminder_day.isoformat()
+                break
+        
+        if reminder_date is None:
+            return False
+        
+        with _reminder_pool_lock:
+            if reminder_date in _reminder_pool:
+                return False
+        
+        logger.info("🤖 Pre-generating reminder messages for %s", reminder_date)
+        threading.Thread(
+            target=self._get_daily_reminder_messages,
+            args=(reminder_date,),
+            name='reminder-prefetch',
+            daemon=True
+        ).start()
+        return True
     
     def check_missed_reminders(self) -> bool:
         """
@@ -123,49 +268,36 @@ class ReminderLogic:
         today = now.date()
         
         # Check if we sent a reminder today
-        last_reminder_date = self.get_last_reminder_date()
-        
-        if last_reminder_date:
-            try:
-                # Parse the date string and ensure it's timezone-aware
-                last_datetime = datetime.fromisoformat(last_reminder_date)
-                if last_datetime.tzinfo is None:
-                    # If timezone-naive, assume it's in Israel timezone
-                    last_datetime = last_datetime.replace(tzinfo=self.utc_tz)
-                last_date = last_datetime.date()
-                if last_date >= today:
-                    print(f"✅ Reminder already sent today ({today})")
-                    return False
-            except Exception as e:
-                print(f"⚠️ Error parsing last reminder date '{last_reminder_date}': {e}")
-                pass
+        if self.reminder_sent_today(today):
+            logger.info("✅ Reminder already sent today (%s)", today)
+            return False
         
         # Check if it's still reasonable to send (within 2 hours of scheduled time)
-        reminder_time = datetime.combine(today, time(17, 0)).replace(tzinfo=self.utc_tz)  # 5:00 PM UTC (equivalent to 8:00 PM Israel time)
-        time_diff = abs((now - reminder_time).total_seconds() / 3600)
+        time_diff = abs(now.hour * 60 + now.minute - LEGACY_REMINDER_MINUTE_OF_DAY) / 60
         
         if time_diff <= 2:  # Within 2 hours
-            print(f"📨 Sending missed reminder for {today} (time diff: {time_diff:.1f} hours)")
+            logger.info("📨 Sending missed reminder for %s (time diff: %.1f hours)", today, time_diff)
             return self.send_reminder(is_missed=True)
         else:
-            print(f"⏰ Too late to send missed reminder for {today} (time diff: {time_diff:.1f} hours)")
+            logger.info("⏰ Too late to send missed reminder for %s (time diff: %.1f hours)", today, time_diff)
             return False
 
-    def check_missed_reminders_for_all_times(self, reminder_times: List[str]) -> int:
+    def check_missed_reminders_for_all_times(self, reminder_times: List[str], now: Optional[datetime] = None) -> int:
         """
         Check for missed reminders for each reminder time and send them if appropriate
         
         Args:
             reminder_times: List of reminder times to check
-            
+            now: Current UTC time (defaults to now)
+        
         Returns:
             Number of reminder times for which missed reminders were sent
         """
-        now = datetime.now(self.utc_tz)
+        now = now or datetime.now(self.utc_tz)
         today = now.date()
         missed_sent_count = 0
         
-        print("🔍 Checking for missed reminders for each time...")
+        logger.info("🔍 Checking for missed reminders for each time...")
         
         for reminder_time in reminder_times:
             try:
@@ -173,101 +305,98 @@ class ReminderLogic:
                 reminder_hour, reminder_minute = map(int, reminder_time.split(':'))
                 
                 # Create datetime for today's reminder time
-                reminder_datetime = datetime.combine(today, time(reminder_hour, reminder_minute)).replace(tzinfo=self.utc_tz)
+                reminder_datetime = datetime.combine(today, time(reminder_hour, reminder_minute), tzinfo=self.utc_tz)
                 
                 # Check if it's within 2 hours of the reminder time but past it
                 time_diff = (now - reminder_datetime).total_seconds() / 3600
                 
                 if 0 < time_diff <= 2:  # Past the reminder time but within 2 hours
                     # Check if we already sent reminders for this time today
-                    db = Database()
-                    customers = db.get_customers_by_reminder_time(reminder_time)
+                    customers = self.db.get_customers_by_reminder_time(reminder_time)
                     
                     # Check if any customer already has a daily reminder record for today
                     already_sent = False
                     for customer in customers:
-                        existing_reminder = db.get_daily_reminder(customer['id'], today.isoformat())
+                        existing_reminder = self.db.get_daily_reminder(customer['id'], today.isoformat())
                         if existing_reminder:
                             already_sent = True
                             break
                     
                     if not already_sent and customers:
-                        print(f"📨 Sending missed reminder for {reminder_time} (time diff: {time_diff:.1f} hours)")
+                        logger.info("📨 Sending missed reminder for %s (time diff: %.1f hours)", reminder_time, time_diff)
                         if self.send_reminder(is_missed=True, specific_time=reminder_time):
                             missed_sent_count += 1
                     else:
                         if already_sent:
-                            print(f"✅ Reminder for {reminder_time} already sent today")
+                            logger.info("✅ Reminder for %s already sent today", reminder_time)
                         else:
-                            print(f"❌ No customers found for reminder time {reminder_time}")
+                            logger.warning("❌ No customers found for reminder time %s", reminder_time)
                 else:
                     if time_diff <= 0:
-                        print(f"⏰ Not time for {reminder_time} reminders yet (current: {now.strftime('%H:%M')}, {abs(time_diff):.1f} hours early)")
+                        logger.debug("⏰ Not time for %s reminders yet (current: %s, %.1f hours early)", reminder_time, now.strftime('%H:%M'), abs(time_diff))
                     else:
-                        print(f"⏰ Too late for {reminder_time} missed reminders (current: {now.strftime('%H:%M')}, {time_diff:.1f} hours past)")
+                        logger.debug("⏰ Too late for %s missed reminders (current: %s, %.1f hours past)", reminder_time, now.strftime('%H:%M'), time_diff)
                         
             except Exception as e:
-                print(f"❌ Error checking missed reminders for time {reminder_time}: {e}")
+                logger.error("❌ Error checking missed reminders for time %s: %s", reminder_time, e)
         
         return missed_sent_count
     
-    def check_and_send_reminders_for_time(self, reminder_time: str) -> bool:
+    def check_and_send_reminders_for_time(self, reminder_time: str, now: Optional[datetime] = None) -> bool:
         """
         Check if it's time to send reminders for a specific time and send them
         
         Args:
             reminder_time: Time in HH:MM format
-            
+            now: Current UTC time (defaults to now)
+        
         Returns:
             True if reminders were sent, False otherwise
         """
         try:
-            now = datetime.now(self.utc_tz)
+            now = now or datetime.now(self.utc_tz)
             current_time_str = now.strftime('%H:%M')
             
             # Parse the reminder time
             reminder_hour, reminder_minute = map(int, reminder_time.split(':'))
-            current_hour = now.hour
-            current_minute = now.minute
             
             # Calculate time difference in minutes
             reminder_total_minutes = reminder_hour * 60 + reminder_minute
-            current_total_minutes = current_hour * 60 + current_minute
+            current_total_minutes = now.hour * 60 + now.minute
             time_diff = current_total_minutes - reminder_total_minutes
             
             # Check if we're within the right time window for sending reminders
             # We want to send when we're AT or PAST the reminder time, but not too far past
             # (to handle 15-minute cron intervals)
             if 0 <= time_diff <= 15:
-                print(f"⏰ It's time to send reminders for {reminder_time} (current: {current_time_str}, {time_diff} minutes past)")
+                logger.info("⏰ It's time to send reminders for %s (current: %s, %s minutes past)", reminder_time, current_time_str, time_diff)
                 
                 # Check if we already sent reminders for this time today
-                db = Database()
                 today = now.date().isoformat()
-                customers = db.get_customers_by_reminder_time(reminder_time)
+                customers = self.db.get_customers_by_reminder_time(reminder_time)
                 
                 # Check if any customer already has a daily reminder record for today
                 already_sent = False
                 for customer in customers:
-                    existing_reminder = db.get_daily_reminder(customer['id'], today)
+                    existing_reminder = self.db.get_daily_reminder(customer['id'], today)
                     if existing_reminder:
                         already_sent = True
                         break
                 
                 if already_sent:
-                    print(f"✅ Reminders for {reminder_time} already sent today")
+                    logger.info("✅ Reminders for %s already sent today", reminder_time)
                     return False
                 else:
                     return self.send_reminder(specific_time=reminder_time)
             else:
                 if time_diff < 0:
-                    print(f"⏰ Not time for {reminder_time} reminders yet (current: {current_time_str}, {abs(time_diff)} minutes early)")
+                    logger.debug("⏰ Not time for %s reminders yet (current: %s, %s minutes early)", reminder_time, current_time_str, abs(time_diff))
                 else:
-                    print(f"⏰ Too late for {reminder_time} reminders (current: {current_time_str}, {time_diff} minutes past)")
+                    logger.debug("⏰ Too late for %s reminders (current: %s, %s minutes past)", reminder_time, current_time_str, time_diff)
                 return False
                 
         except Exception as e:
-            print(f"❌ Error checking reminders for time {reminder_time}: {e}")
+            logger.error("❌ Error checking reminders for time %s: %s", reminder_time, e)
             return False
     
     def get_all_reminder_times(self) -> List[str]:
@@ -278,10 +407,9 @@ class ReminderLogic:
             List of reminder times in HH:MM format
         """
         try:
-            db = Database()
-            return db.get_all_reminder_times()
+            return self.db.get_all_reminder_times()
         except Exception as e:
-            print(f"❌ Error getting reminder times: {e}")
+            logger.error("❌ Error getting reminder times: %s", e)
             return []
     
     def send_reminder(self, is_missed: bool = False, specific_time: str = None) -> bool:
@@ -297,55 +425,51 @@ class ReminderLogic:
         """
         try:
             current_time = datetime.now(self.utc_tz)
-            print(f"Sending {'missed ' if is_missed else ''}reminder at {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # Generate AI message
-            reminder_message = self.generate_ai_reminder_message()
+            logger.info("Sending %sreminder at %s", 'missed ' if is_missed else '', current_time.strftime('%Y-%m-%d %H:%M:%S'))
             
-            # Get customers from database
-            db = Database()
-            
-            if specific_time:
-                # Get customers for specific time
-                customers = db.get_customers_by_reminder_time(specific_time)
-                print(f"📱 Sending reminder to customers with time {specific_time}")
-            else:
-                # Get all active customers (for backward compatibility)
-                customers = db.get_customers(active_only=True)
-                print(f"📱 Sending reminder to all active customers")
+            # Generate AI message in the background while customers are loaded
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                message_future = executor.submit(self.generate_ai_reminder_message)
+                
+                # Get customers from database
+                if specific_time:
+                    # Get customers for specific time
+                    customers = self.db.get_customers_by_reminder_time(specific_time)
+                    logger.info("📱 Sending reminder to customers with time %s", specific_time)
+                else:
+                    # Get all active customers (for backward compatibility)
+                    customers = self.db.get_customers(active_only=True)
+                    logger.info("📱 Sending reminder to all active customers")
+                
+                reminder_message = message_future.result()
             
             if not customers:
-                print(f"❌ No active customers found in database{f' for time {specific_time}' if specific_time else ''}")
+                logger.warning("❌ No active customers found in database%s", f' for time {specific_time}' if specific_time else '')
                 return False
             
-            print(f"📱 Sending reminder to {len(customers)} customers")
+            logger.info("📱 Sending reminder to %s customers", len(customers))
             
-            success_count = 0
-            failed_count = 0
+            # Send via WhatsApp to all customers concurrently
+            responses = self.green_api.send_messages(
+                [(customer['phone_number'], reminder_message) for customer in customers]
+            )
             
-            for customer in customers:
-                try:
-                    # Send via WhatsApp
-                    response = self.green_api.send_message(
-                        phone=customer['phone_number'],
-                        message=reminder_message
-                    )
-                    
+            success_count = sum(1 for response in responses if 'error' not in response)
+            failed_count = len(responses) - success_count
+            
+            # Only walk the results when there is something to log
+            if failed_count or logger.isEnabledFor(logging.DEBUG):
+                for customer, response in zip(customers, responses):
                     if 'error' not in response:
-                        print(f"✅ Reminder sent successfully to {customer['phone_number']} ({customer.get('name', 'Unnamed')})")
-                        success_count += 1
+                        logger.debug("✅ Reminder sent successfully to %s (%s)", customer['phone_number'], customer.get('name', 'Unnamed'))
                     else:
-                        print(f"❌ Failed to send reminder to {customer['phone_number']}: {response['error']}")
-                        failed_count += 1
-                        
-                except Exception as e:
-                    print(f"❌ Error sending reminder to {customer['phone_number']}: {e}")
-                    failed_count += 1
+                        logger.error("❌ Failed to send reminder to %s: %s", customer['phone_number'], response['error'])
             
-            # Save reminder to database
+            # Save reminder to database, marked as sent in the same insert
             reminder_id = self.save_reminder_to_database(
                 scheduled_time=current_time.isoformat(),
-                message=reminder_message
+                message=reminder_message,
+                sent=success_count > 0
             )
             
             # Create daily reminder records for each customer
@@ -353,44 +477,37 @@ class ReminderLogic:
             reminder_time_str = current_time.strftime('%H:%M')
             
             # Calculate next escalation time (30 minutes from now)
-            # Use MySQL-compatible format
-            next_escalation_time = (current_time + timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S')
+            next_escalation_time = (current_time + timedelta(minutes=30)).replace(microsecond=0)
             
-            for customer in customers:
-                try:
-                    daily_reminder_id = db.create_daily_reminder(
-                        customer_id=customer['id'],
-                        reminder_date=reminder_date,
-                        reminder_time=reminder_time_str,
-                        message_sent=reminder_message
-                    )
-                    
-                    # Set initial escalation time
-                    db.update_escalation(
-                        reminder_id=daily_reminder_id,
-                        escalation_level=0,
-                        next_escalation_time=next_escalation_time,
-                        escalation_message=reminder_message
-                    )
-                    
-                    print(f"📝 Created daily reminder record for {customer['phone_number']} (ID: {daily_reminder_id})")
-                except Exception as e:
-                    print(f"❌ Failed to create daily reminder record for {customer['phone_number']}: {e}")
+            # One server-side INSERT ... SELECT for every customer, with the initial escalation time already set
+            try:
+                created = self.db.create_daily_reminders_for_customers(
+                    reminder_date=reminder_date,
+                    reminder_time=reminder_time_str,
+                    message_sent=reminder_message,
+                    next_escalation_time=next_escalation_time,
+                    customer_reminder_time=specific_time
+                )
+                logger.info("📝 Created %s daily reminder records", created)
+            except Exception as e:
+                logger.error("❌ Failed to create daily reminder records: %s", e)
+            
+            if success_count > 0:
+                global _last_reminder_sent_date
+                _last_reminder_sent_date = current_time.date()
             
-            if reminder_id and success_count > 0:
-                # Mark reminder as sent in database
-                if self.mark_reminder_sent_in_database(reminder_id):
-                    print(f"✅ Reminder sent to {success_count} customers, failed: {failed_count}")
-                    return True
+            if success_count > 0:
+                if reminder_id:
+                    logger.info("✅ Reminder sent to %s customers, failed: %s", success_count, failed_count)
                 else:
-                    print("⚠️ Reminder sent but failed to mark as sent in database")
-                    return True  # Still consider it successful
+                    logger.warning("⚠️ Reminder sent but failed to record it in database")
+                return True  # Still consider it successful
             else:
-                print(f"❌ Failed to send reminder to any customers (success: {success_count}, failed: {failed_count})")
+                logger.error("❌ Failed to send reminder to any customers (success: %s, failed: %s)", success_count, failed_count)
                 return False
                 
         except Exception as e:
-            print(f"❌ Error sending reminder: {e}")
+            logger.error("❌ Error sending reminder: %s", e)
             return False
     
     def get_missed_reminders_info(self, days_back: int = 7) -> dict:
@@ -404,17 +521,9 @@ class ReminderLogic:
             Dictionary with missed reminders information
         """
         try:
-            db = Database()
-            missed_reminders = db.get_missed_reminders(days_back)
-            last_reminder_date = db.get_last_reminder_date()
-            
-            return {
-                "total_missed": len(missed_reminders),
-                "missed_dates": [r['scheduled_date'] for r in missed_reminders if r.get('scheduled_date')],
-                "last_sent": last_reminder_date
-            }
+            return self.db.get_missed_reminders_summary(days_back)
         except Exception as e:
-            print(f"❌ Error getting missed reminders info: {e}")
+            logger.error("❌ Error getting missed reminders info: %s", e)
             return {"error": str(e)}
     
     def process_reminder_request(self) -> dict:
@@ -426,33 +535,35 @@ class ReminderLogic:
             Dictionary with result information
         """
         try:
-            print("🔔 Processing reminder request...")
+            logger.info("🔔 Processing reminder request...")
             
             # Get all unique reminder times
             reminder_times = self.get_all_reminder_times()
             
             if not reminder_times:
-                print("❌ No reminder times found in database")
+                logger.warning("❌ No reminder times found in database")
                 return {"status": "error", "message": "No reminder times configured"}
             
-            print(f"⏰ Found {len(reminder_times)} reminder times: {reminder_times}")
+            logger.info("⏰ Found %s reminder times: %s", len(reminder_times), reminder_times)
             
-            # Check each reminder time - ONLY send if it's the right time
+            # Check each reminder time against a single clock reading - ONLY send if it's the right time
+            now = datetime.now(self.utc_tz)
+            self.prefetch_reminder_messages(reminder_times, now)
             reminders_sent = 0
             for reminder_time in reminder_times:
-                if self.check_and_send_reminders_for_time(reminder_time):
+                if self.check_and_send_reminders_for_time(reminder_time, now):
                     reminders_sent += 1
             
             if reminders_sent > 0:
                 return {"status": "success", "message": f"Reminders sent for {reminders_sent} time(s)", "type": "daily"}
             else:
                 # Check for missed reminders only if no current reminders were sent
-                missed_sent = self.check_missed_reminders_for_all_times(reminder_times)
+                missed_sent = self.check_missed_reminders_for_all_times(reminder_times, now)
                 if missed_sent > 0:
                     return {"status": "success", "message": f"Missed reminders sent for {missed_sent} time(s)", "type": "missed"}
                 else:
                     return {"status": "info", "message": "No reminders due at this time", "type": "none"}
                 
         except Exception as e:
-            print(f"❌ Error processing reminder request: {e}")
+            logger.error("❌ Error processing reminder request: %s", e)
             return {"status": "error", "message": f"Error processing reminder: {str(e)}"} 
\ No newline at end of file
@@ -1,13 +1,13 @@
+import logging
 import os
-import sys
-import requests
 from datetime import datetime, timezone
-import pytz
-
-# Add the current directory to Python path to import our modules
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Imported for its side effect of loading .env (MAIN_APP_URL may be set there)
 from config import Config
+from logging_setup import configure_logging
+import json_utils
+
+logger = logging.getLogger(__name__)
 
 class ReminderService:
     def __init__(self, main_app_url: str = None):
@@ -18,7 +18,20 @@ class ReminderService:
         if not self.main_app_url.startswith('http'):
             self.main_app_url = f"https://{self.main_app_url}"
         
-        print(f"🔗 Reminder service configured with main app URL: {self.main_app_url}")
+        # Imported here so a run that bails out before creating the service
+        # doesn't pay for loading requests
+        import requests
+        self._requests = requests
+        
+        # Reuse one connection to the main app for all of this run's calls
+        self._session = requests.Session()
+        self._session.headers.update({'Content-Type': 'application/json'})
+        
+        logger.info("🔗 Reminder service configured with main app URL: %s", self.main_app_url)
+    
+    def close(self):
+        """Close the HTTP session to the main app"""
+        self._session.close()
     
     def _call_main_app_api(self, endpoint: str, method: str = 'GET', data: dict = None) -> dict:
         """
@@ -32,40 +45,46 @@ class ReminderService:
         Returns:
             Response data as dictionary
         """
+        requests = self._requests
+        
         try:
             url = f"{self.main_app_url}{endpoint}"
-            headers = {'Content-Type': 'application/json'}
-            
-            print(f"🌐 Calling main app API: {method} {url}")
+
+            logger.info("🌐 Calling main app API: %s %s", method, url)
             
             if method.upper() == 'GET':
-                response = requests.get(url, timeout=30)
+                response = self._session.get(url, timeout=30)
             elif method.upper() == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=30)
+                body = json_utils.dumps_bytes(data) if data is not None else None
+                response = self._session.post(url, data=body, timeout=30)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             if response.status_code == 200:
-                result = response.json()
-                print(f"✅ API call successful: {endpoint}")
+                result = json_utils.loads(response.content)
+                logger.info("✅ API call successful: %s", endpoint)
                 return result
             else:
-                print(f"❌ API call failed: {response.status_code} - {response.text}")
+                logger.error("❌ API call failed: %s - %s", response.status_code, response.text)
                 return {"error": f"HTTP {response.status_code}: {response.text}"}
                 
         except requests.exceptions.ConnectionError as e:
-            print(f"❌ Connection error calling main app API: {e}")
-            print(f"   Main app URL: {self.main_app_url}")
-            print(f"   Endpoint: {endpoint}")
+            logger.error("❌ Connection error calling main app API: %s", e)
+            logger.error("   Main app URL: %s", self.main_app_url)
+            logger.error("   Endpoint: %s", endpoint)
+            logger.error("   Please check:")
+            logger.error("   1. MAIN_APP_URL is correct")
+            logger.error("   2. Main app is running and accessible")
+            logger.error("   3. Network connectivity")
             return {"error": f"Connection error: {str(e)}"}
         except requests.exceptions.Timeout as e:
-            print(f"❌ Timeout error calling main app API: {e}")
+            logger.error("❌ Timeout error calling main app API: %s", e)
             return {"error": f"Timeout error: {str(e)}"}
         except requests.exceptions.RequestException as e:
-            print(f"❌ Network error calling main app API: {e}")
+            logger.error("❌ Network error calling main app API: %s", e)
             return {"error": f"Network error: {str(e)}"}
         except Exception as e:
-            print(f"❌ Error calling main app API: {e}")
+            logger.error("❌ Error calling main app API: %s", e)
             return {"error": f"API error: {str(e)}"}
     
     def trigger_reminder(self) -> bool:
@@ -77,20 +96,20 @@ class ReminderService:
         """
         try:
             current_time = datetime.now(self.utc_tz)
-            print(f"🔔 Triggering reminder at {current_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            logger.info("🔔 Triggering reminder at %s", current_time.strftime('%Y-%m-%d %H:%M:%S UTC'))
             
             # Call the main app to handle the reminder logic
             response = self._call_main_app_api('/api/reminder/trigger', method='POST')
             
             if 'error' not in response:
-                print(f"✅ Reminder triggered successfully! Response: {response}")
+                logger.info("✅ Reminder triggered successfully! Response: %s", response)
                 return True
             else:
-                print(f"❌ Failed to trigger reminder: {response['error']}")
+                logger.error("❌ Failed to trigger reminder: %s", response['error'])
                 return False
                 
         except Exception as e:
-            print(f"❌ Error triggering reminder: {e}")
+            logger.error("❌ Error triggering reminder: %s", e)
             return False
     
     def check_escalations(self) -> bool:
@@ -102,7 +121,7 @@ class ReminderService:
         """
         try:
             current_time = datetime.now(self.utc_tz)
-            print(f"🚨 Checking escalations at {current_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            logger.info("🚨 Checking escalations at %s", current_time.strftime('%Y-%m-%d %H:%M:%S UTC'))
             
             # Call the main app to handle escalation logic
             response = self._call_main_app_api('/api/escalation/check', method='POST')
@@ -112,68 +131,67 @@ class ReminderService:
                 failed_escalations = response.get('failed_escalations', 0)
                 total_checked = response.get('total_checked', 0)
                 
-                print(f"✅ Escalation check completed!")
-                print(f"   Escalations sent: {escalations_sent}")
-                print(f"   Failed escalations: {failed_escalations}")
-                print(f"   Total checked: {total_checked}")
+                logger.info("✅ Escalation check completed!")
+                logger.info("   Escalations sent: %s", escalations_sent)
+                logger.info("   Failed escalations: %s", failed_escalations)
+                logger.info("   Total checked: %s", total_checked)
                 return True
             else:
-                print(f"❌ Failed to check escalations: {response['error']}")
+                logger.error("❌ Failed to check escalations: %s", response['error'])
                 return False
                 
         except Exception as e:
-            print(f"❌ Error checking escalations: {e}")
+            logger.error("❌ Error checking escalations: %s", e)
             return False
 
 def main():
     """Main function called by Railway cron job"""
-    print("🚀 Starting reminder service...")
+    configure_logging()
+    logger.info("🚀 Starting reminder service...")
+    service = None
     
     try:
         # Get main app URL from environment
         main_app_url = os.environ.get('MAIN_APP_URL')
         if not main_app_url:
-            print("❌ MAIN_APP_URL environment variable not set")
-            print("   Please set MAIN_APP_URL environment variable to your main app's URL")
-            print("   Example: https://your-main-app.railway.app")
+            logger.error("❌ MAIN_APP_URL environment variable not set")
+            logger.error("   Please set MAIN_APP_URL environment variable to your main app's URL")
+            logger.error("   Example: https://your-main-app.railway.app")
             return
         
-        print(f"🔗 Using main app URL: {main_app_url}")
+        logger.info("🔗 Using main app URL: %s", main_app_url)
         
         service = ReminderService(main_app_url)
         
-        # Test connection to main app first
-        print("🔍 Testing connection to main app...")
-        status_response = service._call_main_app_api('/health')
-        if 'error' in status_response:
-            print(f"❌ Cannot connect to main app: {status_response['error']}")
-            print("   Please check:")
-            print("   1. MAIN_APP_URL is correct")
-            print("   2. Main app is running and accessible")
-            print("   3. Network connectivity")
-            return
-        
-        print("✅ Successfully connected to main app")
+        # Optional connectivity probe; the trigger call reports connection errors itself
+        if os.environ.get('REMINDER_DEBUG'):
+            logger.info("🔍 Testing connection to main app...")
+            status_response = service._call_main_app_api('/health')
+            if 'error' in status_response:
+                logger.error("❌ Cannot connect to main app: %s", status_response['error'])
+                return
+            logger.info("✅ Successfully connected to main app")
         
         # Trigger the reminder logic in the main app
         success = service.trigger_reminder()
         if success:
-            print("✅ Reminder triggered successfully")
+            logger.info("✅ Reminder triggered successfully")
         else:
-            print("❌ Failed to trigger reminder")
+            logger.error("❌ Failed to trigger reminder")
         
         # Check for escalations
-        print("🚨 Checking for escalations...")
+        logger.info("🚨 Checking for escalations...")
         escalation_success = service.check_escalations()
         if escalation_success:
-            print("✅ Escalation check completed")
+            logger.info("✅ Escalation check completed")
         else:
-            print("❌ Failed to check escalations")
+            logger.error("❌ Failed to check escalations")
             
     except Exception as e:
-        print(f"❌ Error in reminder service: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in reminder service: %s", e)
+    finally:
+        if service is not None:
+            service.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
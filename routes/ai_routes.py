@@ -1,5 +1,8 @@
+import logging
 from flask import Blueprint, jsonify, request
 
+logger = logging.getLogger(__name__)
+
 # Create blueprint
 ai_routes = Blueprint('ai_routes', __name__)
 
@@ -39,18 +42,18 @@ def test_ai_message():
         
         if response:
             # Get the last processed message to extract intent and AI processing info
-            last_message = message_processor.processed_messages[-1] if message_processor.processed_messages else {}
+            last_message = message_processor.processed_messages[-1] if message_processor.processed_messages else None
             
             return jsonify({
                 "success": True,
                 "response": response,
-                "ai_processed": last_message.get('ai_processed', False),
-                "intent": last_message.get('action', 'unknown_command'),
+                "ai_processed": last_message.ai_processed if last_message else False,
+                "intent": last_message.action if last_message else 'unknown_command',
                 "ai_enabled": message_processor.openai_enabled
             })
         else:
             return jsonify({"success": False, "error": "No response generated"})
             
     except Exception as e:
-        print(f"❌ Error testing AI message: {e}")
+        logger.error("❌ Error testing AI message: %s", e)
         return jsonify({"success": False, "error": f"Error processing message: {str(e)}"}) 
\ No newline at end of file
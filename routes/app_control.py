@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, Response, render_template, jsonify, request
 from datetime import datetime, timezone
 
 # Create blueprint
@@ -33,12 +33,21 @@ def home():
 def api_status():
     """Get app status as JSON"""
     try:
-        message_stats = message_processor.get_statistics() if message_processor else {}
+        # Let polling dashboards revalidate with If-None-Match: the ETag comes from a
+        # cheap version query, so an unchanged poll gets a 304 without building the stats
+        etag = message_processor.get_statistics_version() if message_processor else 'no-processor'
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            message_stats = message_processor.get_statistics() if message_processor else {}
+            response = jsonify({
+                "running": True,
+                "messages": message_stats
+            })
         
-        return jsonify({
-            "running": True,
-            "messages": message_stats
-        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=5'
+        return response
     except Exception as e:
         return jsonify({
             "running": False,
@@ -48,13 +57,13 @@ def api_status():
 @app_control.route('/health')
 def health_check():
     """Health check endpoint for Railway"""
-    return jsonify({"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()})
+    return jsonify({"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds')})
 
 @app_control.route('/cron-test')
 def cron_test():
     """Simple endpoint for Railway cron to test connectivity"""
     return jsonify({
         "status": "cron_test_ok", 
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
         "message": "Cron can reach this endpoint"
     }) 
\ No newline at end of file
@@ -55,34 +55,17 @@ def get_customer_confirmations(customer_id):
     try:
         days_back = request.args.get('days_back', 30, type=int)
         
-        # Get customer info
-        customer = None
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM customers WHERE id = ?', (customer_id,))
-            result = cursor.fetchone()
-            if result:
-                customer = dict(result)
+        # Get customer info and confirmation history
+        history = db.get_customer_confirmations(customer_id, days_back)
         
-        if not customer:
+        if not history:
             return jsonify({
                 'success': False,
                 'error': 'Customer not found'
             }), 404
         
-        # Get confirmation history
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM daily_reminders 
-                WHERE customer_id = ? 
-                AND reminder_date >= date('now', '-{} days')
-                ORDER BY reminder_date DESC
-            '''.format(days_back), (customer_id,))
-            
-            confirmations = []
-            for row in cursor.fetchall():
-                confirmations.append(dict(row))
+        customer = history['customer']
+        confirmations = history['confirmations']
         
         return jsonify({
             'success': True,
@@ -111,19 +94,7 @@ def get_confirmations_by_date(date):
                 'error': 'Invalid date format. Use YYYY-MM-DD'
             }), 400
         
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT dr.*, c.name as customer_name, c.phone_number
-                FROM daily_reminders dr
-                JOIN customers c ON dr.customer_id = c.id
-                WHERE dr.reminder_date = ?
-                ORDER BY dr.reminder_time ASC
-            ''', (date,))
-            
-            confirmations = []
-            for row in cursor.fetchall():
-                confirmations.append(dict(row))
+        confirmations = db.get_confirmations_by_date(date)
         
         return jsonify({
             'success': True,
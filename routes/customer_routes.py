@@ -12,6 +12,12 @@ def set_globals(database):
     global db
     db = database
 
+# Characters allowed as phone number separators, removed before validation
+_PHONE_STRIP_TABLE = str.maketrans('', '', ' \t\n\r\f\v-()')
+
+# Validation pattern, compiled once
+_REMINDER_TIME_RE = re.compile(r'^([01]?[0-9]|2[0-3]):[0-5][0-9]$')
+
 def validate_phone_number(phone_number: str) -> bool:
     """
     Validate phone number format
@@ -23,14 +29,14 @@ def validate_phone_number(phone_number: str) -> bool:
         True if valid, False otherwise
     """
     # Remove any spaces, dashes, or parentheses
-    cleaned = re.sub(r'[\s\-\(\)]', '', phone_number)
+    cleaned = phone_number.translate(_PHONE_STRIP_TABLE)
     
     # Check if it starts with + and has 10-15 digits
     if cleaned.startswith('+'):
         cleaned = cleaned[1:]
     
     # Should be 10-15 digits
-    if not re.match(r'^\d{10,15}$', cleaned):
+    if not (10 <= len(cleaned) <= 15 and cleaned.isascii() and cleaned.isdigit()):
         return False
     
     return True
@@ -46,7 +52,7 @@ def validate_reminder_time(reminder_time: str) -> bool:
         True if valid, False otherwise
     """
     # Check if it matches HH:MM format
-    if not re.match(r'^([01]?[0-9]|2[0-3]):[0-5][0-9]$', reminder_time):
+    if not _REMINDER_TIME_RE.match(reminder_time):
         return False
     
     return True
@@ -119,26 +125,80 @@ def add_customer():
                 'error': 'Invalid reminder time format. Please use HH:MM format (e.g., 20:00)'
             }), 400
         
-        # Check if customer already exists
-        existing_customer = db.get_customer_by_phone(phone_number)
-        if existing_customer:
+        # Add customer (the unique phone number key rejects duplicates)
+        new_customer = db.create_customer(phone_number, name if name else None, reminder_time)
+        if new_customer is None:
             return jsonify({
                 'success': False,
                 'error': 'Customer with this phone number already exists'
             }), 409
         
-        # Add customer
-        customer_id = db.add_customer(phone_number, name if name else None, reminder_time)
-        
-        # Get the added customer
-        new_customer = db.get_customer_by_phone(phone_number)
-        
         return jsonify({
             'success': True,
             'message': 'Customer added successfully',
             'customer': new_customer
         }), 201
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@customer_routes.route('/api/customers/bulk', methods=['POST'])
+def add_customers_bulk():
+    """Add many customers in one request and one database transaction"""
+    try:
+        # Check if database is available
+        if db is None:
+            return jsonify({
+                'success': False,
+                'error': 'Database not initialized - check server configuration and database connection'
+            }), 503
+        
+        data = request.get_json()
+        
+        if not isinstance(data, list) or not data:
+            return jsonify({
+                'success': False,
+                'error': 'Expected a non-empty JSON array of customers'
+            }), 400
+        
+        # Validate every entry before writing anything
+        rows = []
+        errors = []
+        seen_phones = set()
+        for index, item in enumerate(data):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'error': 'Customer must be an object'})
+                continue
+            
+            phone_number = (item.get('phone_number') or '').strip()
+            name = (item.get('name') or '').strip()
+            reminder_time = (item.get('reminder_time') or '20:00').strip()
+            
+            if not phone_number or not validate_phone_number(phone_number):
+                errors.append({'index': index, 'error': 'Invalid phone number format'})
+            elif not validate_reminder_time(reminder_time):
+                errors.append({'index': index, 'error': 'Invalid reminder time format'})
+            elif phone_number in seen_phones:
+                errors.append({'index': index, 'error': 'Duplicate phone number in request'})
+            else:
+                seen_phones.add(phone_number)
+                rows.append((phone_number, name if name else None, reminder_time))
+        
+        added = db.add_customers_bulk(rows)
+        added_set = set(added)
+        existing = [phone_number for phone_number, _, _ in rows if phone_number not in added_set]
         
+        return jsonify({
+            'success': True,
+            'added': added,
+            'added_count': len(added),
+            'already_exist': existing,
+            'errors': errors
+        }), 201 if added else 200
+    
     except Exception as e:
         return jsonify({
             'success': False,
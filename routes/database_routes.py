@@ -1,4 +1,5 @@
-from flask import Blueprint, jsonify, request
+import time
+from flask import Blueprint, Response, jsonify, request
 
 # Create blueprint
 database_routes = Blueprint('database_routes', __name__)
@@ -6,6 +7,10 @@ database_routes = Blueprint('database_routes', __name__)
 # Global variables (will be set by main app)
 message_processor = None
 
+# The database size is approximate, so a cached stats response is revalidated
+# at least this often even when no messages changed
+DATABASE_SIZE_REFRESH_SECONDS = 60
+
 def set_globals(processor):
     """Set global variables from main app"""
     global message_processor
@@ -18,15 +23,26 @@ def database_stats():
         return jsonify({"error": "Message processor not initialized"}), 400
     
     try:
-        db = message_processor.db
-        stats = db.get_statistics()
-        db_size = db.get_database_size()
+        # Let polling dashboards revalidate with If-None-Match: the ETag comes from a
+        # cheap version query, so an unchanged poll gets a 304 without the aggregate queries
+        size_bucket = int(time.time() // DATABASE_SIZE_REFRESH_SECONDS)
+        etag = f"{message_processor.get_statistics_version()}-{size_bucket}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            db = message_processor.db
+            stats = message_processor.get_statistics()
+            db_size = db.get_database_size()
+            
+            response = jsonify({
+                "database_size_bytes": db_size,
+                "database_size_mb": round(db_size / (1024 * 1024), 2),
+                "statistics": stats
+            })
         
-        return jsonify({
-            "database_size_bytes": db_size,
-            "database_size_mb": round(db_size / (1024 * 1024), 2),
-            "statistics": stats
-        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=5'
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -42,6 +58,7 @@ def cleanup_database():
         
         db = message_processor.db
         db.cleanup_old_messages(days_to_keep)
+        message_processor.invalidate_statistics()
         
         return jsonify({
             "success": True, 
@@ -1,8 +1,11 @@
+import logging
 from flask import Blueprint, request, jsonify
 from database import Database
-from escalation_logic import EscalationLogic
+from escalation_logic import EscalationLogic, MAX_ESCALATION_LEVEL, MAX_ESCALATION_WINDOW
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 escalation_routes = Blueprint('escalation_routes', __name__)
 
 # Global variables
@@ -19,69 +22,64 @@ def set_globals(database):
 def check_and_send_escalations():
     """Check for reminders that need escalation and send them"""
     try:
-        # Get reminders that need escalation
-        reminders_needing_escalation = db.get_reminders_needing_escalation()
+        # Get reminders that need escalation (stop conditions are applied in the query)
+        reminders_to_escalate = db.get_pending_escalations(MAX_ESCALATION_LEVEL, MAX_ESCALATION_WINDOW)
         
-        if not reminders_needing_escalation:
+        if not reminders_to_escalate:
             return jsonify({
                 'success': True,
                 'message': 'No reminders need escalation',
                 'escalations_sent': 0
             })
         
-        print(f"🚨 Found {len(reminders_needing_escalation)} reminders needing escalation")
+        logger.info("🚨 Found %s reminders needing escalation", len(reminders_to_escalate))
         
         escalations_sent = 0
         failed_escalations = 0
         
-        for reminder in reminders_needing_escalation:
+        # Generate all messages in one batch, then send them
+        sent_messages = escalation_logic.send_escalations(reminders_to_escalate)
+        
+        current_time = datetime.now(timezone.utc)
+        escalation_updates = []
+        for reminder, escalation_message in zip(reminders_to_escalate, sent_messages):
             try:
-                # Check if we should stop escalating
-                if escalation_logic.should_stop_escalating(reminder):
-                    print(f"⏹️ Stopping escalation for {reminder['phone_number']} - conditions met")
-                    continue
-                
-                # Send escalation
-                success = escalation_logic.send_escalation(reminder)
-                
-                if success:
-                    # Update escalation level in database
-                    current_time = datetime.now(timezone.utc)
+                if escalation_message is not None:
                     next_escalation_time = escalation_logic.calculate_next_escalation_time(
                         current_time, 
                         reminder['escalation_level'] + 1
                     )
                     
-                    # Get the escalation message that was sent
-                    escalation_message = escalation_logic.generate_escalation_message(
+                    # Record the exact message that was sent
+                    escalation_updates.append((
+                        reminder['id'],
                         reminder['escalation_level'] + 1,
-                        reminder.get('customer_name')
-                    )
-                    
-                    # Update database
-                    db.update_escalation(
-                        reminder_id=reminder['id'],
-                        escalation_level=reminder['escalation_level'] + 1,
-                        next_escalation_time=next_escalation_time,
-                        escalation_message=escalation_message
-                    )
-                    
-                    escalations_sent += 1
-                    print(f"✅ Escalation sent and recorded for {reminder['phone_number']}")
+                        next_escalation_time,
+                        escalation_message
+                    ))
                 else:
                     failed_escalations += 1
-                    print(f"❌ Failed to send escalation for {reminder['phone_number']}")
-                    
+                    logger.error("❌ Failed to send escalation for %s", reminder['phone_number'])
+            
             except Exception as e:
                 failed_escalations += 1
-                print(f"❌ Error processing escalation for {reminder['phone_number']}: {e}")
+                logger.error("❌ Error processing escalation for %s: %s", reminder['phone_number'], e)
+        
+        # Update escalation levels in database in one transaction
+        try:
+            escalations_sent = db.bulk_update_escalations(escalation_updates)
+            failed_escalations += len(escalation_updates) - escalations_sent
+            logger.info("✅ %s escalations sent and recorded", escalations_sent)
+        except Exception as e:
+            failed_escalations += len(escalation_updates)
+            logger.error("❌ Error recording escalations: %s", e)
         
         return jsonify({
             'success': True,
             'message': f'Escalation check completed',
             'escalations_sent': escalations_sent,
             'failed_escalations': failed_escalations,
-            'total_checked': len(reminders_needing_escalation)
+            'total_checked': len(reminders_to_escalate)
         })
         
     except Exception as e:
@@ -112,13 +110,7 @@ def get_escalation_stats():
 def get_pending_escalations():
     """Get reminders that are pending escalation"""
     try:
-        reminders_needing_escalation = db.get_reminders_needing_escalation()
-        
-        # Filter out reminders that should stop escalating
-        pending_escalations = []
-        for reminder in reminders_needing_escalation:
-            if not escalation_logic.should_stop_escalating(reminder):
-                pending_escalations.append(reminder)
+        pending_escalations = db.get_pending_escalations(MAX_ESCALATION_LEVEL, MAX_ESCALATION_WINDOW)
         
         return jsonify({
             'success': True,
@@ -1,16 +1,29 @@
+import logging
 from flask import Blueprint, jsonify, request
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 # Create blueprint
 reminder_routes = Blueprint('reminder_routes', __name__)
 
 # Global variables (will be set by main app)
 message_processor = None
+reminder_logic = None
 
 def set_globals(processor):
     """Set global variables from main app"""
-    global message_processor
+    global message_processor, reminder_logic
     message_processor = processor
+    reminder_logic = None
+
+def get_reminder_logic():
+    """Get the shared ReminderLogic, creating it on first use"""
+    global reminder_logic
+    if reminder_logic is None:
+        from reminder.reminder_logic import ReminderLogic
+        reminder_logic = ReminderLogic(db=message_processor.db if message_processor else None)
+    return reminder_logic
 
 @reminder_routes.route('/api/test-reminder', methods=['POST'])
 def test_reminder():
@@ -21,9 +34,8 @@ def test_reminder():
 def test_ai_reminder():
     """Test AI reminder message generation"""
     try:
-        # Import and use the reminder logic
-        from reminder.reminder_logic import ReminderLogic
-        logic = ReminderLogic()
+        # Use the shared reminder logic
+        logic = get_reminder_logic()
         
         # Generate AI message without sending
         ai_message = logic.generate_ai_reminder_message()
@@ -35,16 +47,15 @@ def test_ai_reminder():
             "is_ai_generated": ai_message != Config.REMINDER_MESSAGE
         })
     except Exception as e:
-        print(f"❌ Error testing AI reminder: {e}")
+        logger.error("❌ Error testing AI reminder: %s", e)
         return jsonify({"success": False, "error": f"Error generating AI reminder: {str(e)}"})
 
 @reminder_routes.route('/api/send-reminder', methods=['POST'])
 def send_reminder():
     """Send daily reminder (called by Railway cron or manual test)"""
     try:
-        # Import and use the reminder logic
-        from reminder.reminder_logic import ReminderLogic
-        logic = ReminderLogic()
+        # Use the shared reminder logic
+        logic = get_reminder_logic()
         
         # Process the reminder request
         result = logic.process_reminder_request()
@@ -59,15 +70,14 @@ def send_reminder():
             return jsonify({"success": False, "error": result["message"]})
             
     except Exception as e:
-        print(f"❌ Error sending reminder: {e}")
+        logger.error("❌ Error sending reminder: %s", e)
         return jsonify({"success": False, "error": f"Error sending reminder: {str(e)}"})
 
 @reminder_routes.route('/api/check-missed-reminders', methods=['POST'])
 def check_missed_reminders():
     """Manually check for missed reminders"""
     try:
-        from reminder.reminder_logic import ReminderLogic
-        logic = ReminderLogic()
+        logic = get_reminder_logic()
         
         # Get missed reminders info
         missed_info = logic.get_missed_reminders_info()
@@ -83,16 +93,15 @@ def check_missed_reminders():
         })
         
     except Exception as e:
-        print(f"❌ Error checking missed reminders: {e}")
+        logger.error("❌ Error checking missed reminders: %s", e)
         return jsonify({"success": False, "error": f"Error checking missed reminders: {str(e)}"})
 
 @reminder_routes.route('/api/reminder/trigger', methods=['POST'])
 def trigger_reminder():
     """Trigger reminder logic (called by reminder service)"""
     try:
-        # Import and use the reminder logic
-        from reminder.reminder_logic import ReminderLogic
-        logic = ReminderLogic()
+        # Use the shared reminder logic
+        logic = get_reminder_logic()
         
         # Process the reminder request
         result = logic.process_reminder_request()
@@ -100,5 +109,5 @@ def trigger_reminder():
         return jsonify(result)
         
     except Exception as e:
-        print(f"❌ Error triggering reminder: {e}")
+        logger.error("❌ Error triggering reminder: %s", e)
         return jsonify({"error": f"Error triggering reminder: {str(e)}"}), 500 
\ No newline at end of file
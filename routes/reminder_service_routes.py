@@ -24,12 +24,14 @@ def save_reminder():
         
         scheduled_time = data.get('scheduled_time')
         message = data.get('message')
+        # Callers that already sent the reminder can pass sent=true instead of calling mark-sent
+        sent = bool(data.get('sent', False))
         
         if not scheduled_time or not message:
             return jsonify({"error": "scheduled_time and message are required"}), 400
         
         # Save to database
-        reminder_id = message_processor.db.save_reminder(scheduled_time, message)
+        reminder_id = message_processor.db.save_reminder(scheduled_time, message, sent=sent)
         
         return jsonify({
             "success": True,
@@ -70,15 +72,8 @@ def get_missed_reminders_info():
         data = request.get_json() or {}
         days_back = data.get('days_back', 7)
         
-        # Get missed reminders from database
-        missed_reminders = message_processor.db.get_missed_reminders(days_back)
-        last_reminder_date = message_processor.db.get_last_reminder_date()
-        
-        return jsonify({
-            "total_missed": len(missed_reminders),
-            "missed_dates": [r['scheduled_date'] for r in missed_reminders if r.get('scheduled_date')],
-            "last_sent": last_reminder_date
-        })
+        # Get missed reminders and the last sent date from database in one query
+        return jsonify(message_processor.db.get_missed_reminders_summary(days_back))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
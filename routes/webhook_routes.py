@@ -1,6 +1,15 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from flask import Blueprint, jsonify, request
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 # Create blueprint
 webhook_routes = Blueprint('webhook_routes', __name__)
 
@@ -8,12 +17,44 @@ webhook_routes = Blueprint('webhook_routes', __name__)
 message_processor = None
 green_api = None
 
+# Incoming messages are processed off the request thread so Green API gets its 200
+# right away instead of waiting on OpenAI. A single worker keeps messages in order.
+_webhook_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='webhook')
+
+# Notification deletes are queued and flushed in batches (up to the batch size, or
+# whatever arrived within the flush window) over the shared keep-alive session
+NOTIFICATION_DELETE_BATCH_SIZE = 64
+NOTIFICATION_DELETE_FLUSH_SECONDS = 0.2
+_delete_queue = queue.Queue()
+_delete_thread = None
+_delete_thread_lock = threading.Lock()
+
+# Green API webhook settings are cached briefly so polling /api/webhook/status
+# doesn't trigger an upstream call each time; cleared when the webhook changes
+WEBHOOK_SETTINGS_CACHE_TTL_SECONDS = 30
+_webhook_settings_cache = TTLCache(maxsize=1, ttl=WEBHOOK_SETTINGS_CACHE_TTL_SECONDS)
+_webhook_settings_lock = threading.Lock()
+
+# IDs of recently accepted messages, so redelivered notifications are not
+# processed (and answered) twice; bounded LRU, oldest dropped first
+SEEN_MESSAGE_IDS_MAX = 4096
+_seen_message_ids = OrderedDict()
+_seen_message_ids_lock = threading.Lock()
+
 def set_globals(processor, api):
     """Set global variables from main app"""
     global message_processor, green_api
     message_processor = processor
     green_api = api
 
+# Where the text lives for each Green API message type: typeMessage -> (data key, text key).
+# Other message types can be added here as needed
+_MESSAGE_TEXT_FIELDS = {
+    'textMessage': ('textMessageData', 'textMessage'),
+    'extendedTextMessage': ('extendedTextMessageData', 'text'),
+    'quotedMessage': ('extendedTextMessageData', 'text'),
+}
+
 def extract_message_content(notification):
     """Extract message content from Green API notification structure"""
     # Handle different message types
@@ -24,21 +65,92 @@ def extract_message_content(notification):
     # New webhook format
     if 'messageData' in notification:
         message_data = notification['messageData']
+        message_type = message_data.get('typeMessage')
         
-        # Extended text message
-        if 'extendedTextMessageData' in message_data:
-            return message_data['extendedTextMessageData'].get('text', '')
+        fields = _MESSAGE_TEXT_FIELDS.get(message_type)
+        if fields is None:
+            logger.warning("⚠️ Unsupported message type: %s", message_type or 'unknown')
+            return ''
         
-        # Text message
-        if 'textMessageData' in message_data:
-            return message_data['textMessageData'].get('textMessage', '')
-        
-        # Other message types can be added here as needed
-        print(f"⚠️ Unsupported message type: {message_data.get('typeMessage', 'unknown')}")
-        return ''
+        data_key, text_key = fields
+        return message_data.get(data_key, {}).get(text_key, '')
     
     return ''
 
+def _queue_notification_delete(receipt_id):
+    """Queue a notification for deletion, starting the delete worker on first use"""
+    global _delete_thread
+    with _delete_thread_lock:
+        if _delete_thread is None:
+            _delete_thread = threading.Thread(target=_delete_notifications_loop, name='webhook-delete', daemon=True)
+            _delete_thread.start()
+    _delete_queue.put(receipt_id)
+
+def _delete_notifications_loop():
+    """Drain queued receipt IDs and delete them in batches"""
+    while True:
+        receipt_ids = [_delete_queue.get()]
+        deadline = time.monotonic() + NOTIFICATION_DELETE_FLUSH_SECONDS
+        while len(receipt_ids) < NOTIFICATION_DELETE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                receipt_ids.append(_delete_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            results = green_api.delete_notifications(receipt_ids)
+            failed = results.count(False)
+            if failed:
+                logger.warning("⚠️ Failed to delete %s of %s notifications", failed, len(receipt_ids))
+        except Exception as e:
+            logger.error("❌ Error deleting notifications: %s", e)
+
+def _get_webhook_settings():
+    """Get the Green API webhook settings, from the cache when fresh"""
+    with _webhook_settings_lock:
+        settings = _webhook_settings_cache.get('settings')
+        if settings is None:
+            settings = green_api.get_webhook_settings()
+            # Don't cache failures so the next poll retries
+            if 'error' not in settings:
+                _webhook_settings_cache['settings'] = settings
+        return settings
+
+def _clear_webhook_settings_cache():
+    """Drop cached webhook settings after changing them"""
+    with _webhook_settings_lock:
+        _webhook_settings_cache.clear()
+
+def _is_duplicate_message(message_id):
+    """Record a message ID, returning True if it was already seen recently"""
+    with _seen_message_ids_lock:
+        if message_id in _seen_message_ids:
+            _seen_message_ids.move_to_end(message_id)
+            return True
+        _seen_message_ids[message_id] = None
+        if len(_seen_message_ids) > SEEN_MESSAGE_IDS_MAX:
+            _seen_message_ids.popitem(last=False)
+        return False
+
+def _handle_webhook_message(processed_notification, sender_chat_id, sender_phone, message_content, receipt_id):
+    """Process a webhook message and send the reply (runs on the webhook worker thread)"""
+    try:
+        response = message_processor.process_message(processed_notification)
+        
+        if response:
+            # Send response back
+            green_api.send_message(sender_chat_id, response)
+            logger.info("📨 Processed webhook message from %s: %s", sender_phone, message_content)
+        
+        # Delete the notification if we have a receiptId (for polling mode)
+        if receipt_id:
+            _queue_notification_delete(receipt_id)
+    except Exception as e:
+        logger.error("❌ Error processing webhook message: %s", e)
+
 @webhook_routes.route('/webhook', methods=['POST'])
 def webhook_handler():
     """Handle incoming webhook notifications from Green API"""
@@ -49,7 +161,7 @@ def webhook_handler():
         if not notification:
             return jsonify({"error": "No data received"}), 400
         
-        print(f"📨 Received webhook notification: {notification}")
+        logger.info("📨 Received webhook notification: %s", notification)
         
         # Extract message content
         message_content = extract_message_content(notification)
@@ -57,12 +169,18 @@ def webhook_handler():
         if message_content:
             # Check if the message is from the authorized recipient
             sender_chat_id = notification.get('senderData', {}).get('chatId', '')
-            sender_phone = sender_chat_id.split('@')[0] if '@' in sender_chat_id else sender_chat_id
+            sender_phone = sender_chat_id.partition('@')[0]
             
-            if sender_phone != Config.RECIPIENT_PHONE:
-                print(f"🚫 Ignoring message from unauthorized sender: {sender_phone} (expected: {Config.RECIPIENT_PHONE})")
+            if sender_phone not in Config.AUTHORIZED_PHONES:
+                logger.warning("🚫 Ignoring message from unauthorized sender: %s (expected: %s)", sender_phone, ', '.join(sorted(Config.AUTHORIZED_PHONES)))
                 return jsonify({"success": True, "message": "Unauthorized sender ignored"}), 200
             
+            # Skip notifications Green API redelivers for a message we already accepted
+            message_id = notification.get('idMessage') or notification.get('receiptId')
+            if message_id and _is_duplicate_message(message_id):
+                logger.info("🔁 Ignoring duplicate delivery of message %s", message_id)
+                return jsonify({"success": True, "duplicate": True}), 200
+            
             # Create a standardized notification structure for the message processor
             processed_notification = {
                 'body': message_content,
@@ -70,22 +188,19 @@ def webhook_handler():
                 'receiptId': notification.get('receiptId') or notification.get('idMessage')
             }
             
-            response = message_processor.process_message(processed_notification)
-            
-            if response:
-                # Send response back
-                green_api.send_message(sender_phone, response)
-                print(f"📨 Processed webhook message from {sender_phone}: {message_content}")
-            
-            # Delete the notification if we have a receiptId (for polling mode)
-            receipt_id = notification.get('receiptId')
-            if receipt_id:
-                green_api.delete_notification(receipt_id)
+            _webhook_executor.submit(
+                _handle_webhook_message,
+                processed_notification,
+                sender_chat_id,
+                sender_phone,
+                message_content,
+                notification.get('receiptId')
+            )
         
         return jsonify({"success": True}), 200
         
     except Exception as e:
-        print(f"❌ Error processing webhook: {e}")
+        logger.error("❌ Error processing webhook: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @webhook_routes.route('/api/webhook/status')
@@ -95,7 +210,7 @@ def webhook_status():
         return jsonify({"error": "Green API client not initialized"}), 400
     
     try:
-        settings = green_api.get_webhook_settings()
+        settings = _get_webhook_settings()
         return jsonify({
             "webhook_enabled": Config.WEBHOOK_ENABLED,
             "webhook_url": Config.WEBHOOK_URL,
@@ -118,6 +233,7 @@ def setup_webhook():
             return jsonify({"error": "webhook_url is required"}), 400
         
         result = green_api.set_webhook_url(webhook_url)
+        _clear_webhook_settings_cache()
         
         if 'error' not in result:
             return jsonify({"success": True, "message": "Webhook set successfully"})
@@ -135,6 +251,7 @@ def disable_webhook():
     
     try:
         result = green_api.delete_webhook_url()
+        _clear_webhook_settings_cache()
         
         if 'error' not in result:
             return jsonify({"success": True, "message": "Webhook disabled successfully"})
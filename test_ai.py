@@ -4,8 +4,10 @@ Test script for AI message processing
 Run this script to test the AI functionality without starting the full web app
 """
 
+import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,45 +19,74 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config import Config
 from message_processor import MessageProcessor
 
-def test_ai_message(message):
+def make_mock_message(message):
+    """Create mock webhook message data for a test message"""
+    return {
+        'body': message,
+        'senderData': {
+            'chatId': 'test_user@c.us'
+        }
+    }
+
+def print_ai_result(processor, message, response):
+    """Print the result of processing a test message"""
+    if response:
+        # Find this message's record (messages may have been processed concurrently)
+        last_message = next(
+            (record for record in reversed(processor.processed_messages) if record.message == message),
+            None
+        )
+        
+        print(f"\n🤖 AI Test Results:")
+        print(f"📝 Input Message: '{message}'")
+        print(f"💬 Response: '{response}'")
+        print(f"🔧 Processing Method: {'🤖 AI Processing' if last_message and last_message.ai_processed else '📝 Template Response'}")
+        print(f"🎯 Intent Classified: {last_message.action if last_message else 'unknown_command'}")
+        print(f"🤖 AI Enabled: {processor.openai_enabled}")
+        
+        return True
+    else:
+        print("❌ No response generated")
+        return False
+
+def test_ai_message(message, processor=None):
     """Test AI message processing"""
     try:
-        # Initialize message processor
-        processor = MessageProcessor()
-        
-        # Create mock message data
-        mock_message = {
-            'body': message,
-            'senderData': {
-                'chatId': 'test_user@c.us'
-            }
-        }
+        # Initialize message processor unless one is shared across tests
+        processor = processor or MessageProcessor()
         
         # Process the message
-        response = processor.process_message(mock_message)
+        response = processor.process_message(make_mock_message(message))
         
-        if response:
-            # Get the last processed message
-            last_message = processor.processed_messages[-1] if processor.processed_messages else {}
-            
-            print(f"\n🤖 AI Test Results:")
-            print(f"📝 Input Message: '{message}'")
-            print(f"💬 Response: '{response}'")
-            print(f"🔧 Processing Method: {'🤖 AI Processing' if last_message.get('ai_processed', False) else '📝 Template Response'}")
-            print(f"🎯 Intent Classified: {last_message.get('action', 'unknown_command')}")
-            print(f"🤖 AI Enabled: {processor.openai_enabled}")
-            
-            return True
-        else:
-            print("❌ No response generated")
-            return False
+        return print_ai_result(processor, message, response)
             
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
 
+def run_batch(processor, test_messages):
+    """Process all test messages concurrently, then print the results in order"""
+    with ThreadPoolExecutor(max_workers=len(test_messages)) as executor:
+        futures = [
+            executor.submit(processor.process_message, make_mock_message(message))
+            for message in test_messages
+        ]
+    
+    for i, (message, future) in enumerate(zip(test_messages, futures), 1):
+        print(f"\n🧪 Test {i}/{len(test_messages)}")
+        print("-" * 30)
+        try:
+            print_ai_result(processor, message, future.result())
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
 def main():
     """Main test function"""
+    parser = argparse.ArgumentParser(description="Test AI message processing")
+    parser.add_argument('--batch', action='store_true',
+                        help="run all test messages concurrently without pausing between them")
+    args = parser.parse_args()
+    
     print("🤖 AI Message Processing Test")
     print("=" * 40)
     
@@ -83,13 +114,19 @@ def main():
         "תודה לך על התזכורת"  # Hebrew: "Thank you for the reminder"
     ]
     
-    for i, message in enumerate(test_messages, 1):
-        print(f"\n🧪 Test {i}/{len(test_messages)}")
-        print("-" * 30)
-        test_ai_message(message)
-        
-        if i < len(test_messages):
-            input("\nPress Enter to continue to next test...")
+    # One processor (and its database/OpenAI clients) for all tests
+    processor = MessageProcessor()
+    
+    if args.batch:
+        run_batch(processor, test_messages)
+    else:
+        for i, message in enumerate(test_messages, 1):
+            print(f"\n🧪 Test {i}/{len(test_messages)}")
+            print("-" * 30)
+            test_ai_message(message, processor)
+            
+            if i < len(test_messages):
+                input("\nPress Enter to continue to next test...")
     
     print(f"\n✅ All tests completed!")
     print("💡 Try the web interface at http://localhost:5000 for interactive testing")
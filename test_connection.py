@@ -6,18 +6,20 @@ Test script to debug connection issues between reminder service and main app
 import os
 import sys
 import requests
-from datetime import datetime, timezone
-import pytz
+from datetime import datetime, time, timezone
 
 def test_main_app_connection(main_app_url):
     """Test connection to main app"""
     print(f"🔍 Testing connection to main app: {main_app_url}")
     
+    # One session so the probes reuse a single keep-alive connection
+    session = requests.Session()
+
     # Test health endpoint
     try:
         health_url = f"{main_app_url}/health"
         print(f"   Testing health endpoint: {health_url}")
-        response = requests.get(health_url, timeout=10)
+        response = session.get(health_url, timeout=10)
         print(f"   Health response: {response.status_code} - {response.text}")
     except Exception as e:
         print(f"   ❌ Health endpoint failed: {e}")
@@ -26,7 +28,7 @@ def test_main_app_connection(main_app_url):
     try:
         last_date_url = f"{main_app_url}/api/reminders/last-date"
         print(f"   Testing last date endpoint: {last_date_url}")
-        response = requests.get(last_date_url, timeout=10)
+        response = session.get(last_date_url, timeout=10)
         print(f"   Last date response: {response.status_code} - {response.text}")
     except Exception as e:
         print(f"   ❌ Last date endpoint failed: {e}")
@@ -35,10 +37,12 @@ def test_main_app_connection(main_app_url):
     try:
         status_url = f"{main_app_url}/api/status"
         print(f"   Testing status endpoint: {status_url}")
-        response = requests.get(status_url, timeout=10)
+        response = session.get(status_url, timeout=10)
         print(f"   Status response: {response.status_code} - {response.text}")
     except Exception as e:
         print(f"   ❌ Status endpoint failed: {e}")
+    
+    session.close()
 
 def test_timezone_handling():
     """Test timezone handling"""
@@ -52,7 +56,6 @@ def test_timezone_handling():
     print(f"   Today's date: {today}")
     
     # Test reminder time calculation
-    from datetime import time
     reminder_time = datetime.combine(today, time(17, 0)).replace(tzinfo=utc_tz)  # 5 PM UTC
     print(f"   Reminder time: {reminder_time}")
     
@@ -3,11 +3,13 @@
 Test script for the escalation system
 """
 
+import argparse
 import os
 import sys
+import traceback
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-import pytz
 
 # Add the current directory to Python path to import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -16,6 +18,16 @@ from config import Config
 from database import Database
 from escalation_logic import EscalationLogic
 
+# One Database instance for all tests
+_db = None
+
+def _get_database():
+    """Get the shared Database instance, creating it on first use"""
+    global _db
+    if _db is None:
+        _db = Database()
+    return _db
+
 def test_escalation_logic():
     """Test the escalation logic"""
     print("🧪 Testing Escalation Logic...")
@@ -23,10 +35,11 @@ def test_escalation_logic():
     # Initialize escalation logic
     escalation_logic = EscalationLogic()
     
-    # Test message generation for each level
-    for level in range(1, 5):
+    # Test message generation for each level (all levels' pools filled in one batch)
+    levels = range(1, 5)
+    messages = escalation_logic.generate_escalation_messages_batch([(level, "Test User") for level in levels])
+    for level, message in zip(levels, messages):
         print(f"\n--- Testing Level {level} ---")
-        message = escalation_logic.generate_escalation_message(level, "Test User")
         print(f"Level {level} message: {message}")
     
     # Test with no customer name
@@ -40,7 +53,7 @@ def test_database_escalation_methods():
     """Test database escalation methods"""
     print("\n🗄️ Testing Database Escalation Methods...")
     
-    db = Database()
+    db = _get_database()
     
     # Test getting reminders needing escalation
     reminders = db.get_reminders_needing_escalation()
@@ -52,64 +65,55 @@ def test_database_escalation_methods():
     
     print("✅ Database escalation methods tests completed")
 
-def test_escalation_api():
-    """Test escalation API endpoints"""
-    print("\n🌐 Testing Escalation API...")
-    
-    base_url = "http://localhost:5000"
-    
-    # Test escalation stats
+def _call_escalation_api(session, base_url, method, path, label, json=None):
+    """Call one escalation endpoint and return the line to print for it"""
     try:
-        response = requests.get(f"{base_url}/api/escalation/stats")
+        response = session.request(method, f"{base_url}{path}", json=json, timeout=5)
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Escalation stats API: {data}")
+            return f"✅ {label} API: {data}"
         else:
-            print(f"❌ Escalation stats API failed: {response.status_code}")
+            return f"❌ {label} API failed: {response.status_code}"
     except Exception as e:
-        print(f"❌ Escalation stats API error: {e}")
+        return f"❌ {label} API error: {e}"
+
+def test_escalation_api():
+    """Test escalation API endpoints"""
+    print("\n🌐 Testing Escalation API...")
     
-    # Test pending escalations
-    try:
-        response = requests.get(f"{base_url}/api/escalation/pending")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Pending escalations API: {data}")
-        else:
-            print(f"❌ Pending escalations API failed: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Pending escalations API error: {e}")
+    base_url = "http://localhost:5000"
     
-    # Test escalation check
+    # Probe once so an offline app costs one short timeout instead of one per endpoint
     try:
-        response = requests.post(f"{base_url}/api/escalation/check")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Escalation check API: {data}")
-        else:
-            print(f"❌ Escalation check API failed: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Escalation check API error: {e}")
+        requests.get(f"{base_url}/health", timeout=1)
+    except requests.exceptions.RequestException:
+        print("⏭️ App not running, skipping API tests")
+        return
     
-    # Test escalation message generation
-    try:
-        response = requests.post(f"{base_url}/api/escalation/test/2", 
-                               json={"customer_name": "Test User"})
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Escalation test API: {data}")
-        else:
-            print(f"❌ Escalation test API failed: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Escalation test API error: {e}")
+    calls = [
+        ('GET', '/api/escalation/stats', "Escalation stats", None),
+        ('GET', '/api/escalation/pending', "Pending escalations", None),
+        ('POST', '/api/escalation/check', "Escalation check", None),
+        ('POST', '/api/escalation/test/2', "Escalation test", {"customer_name": "Test User"}),
+    ]
+    
+    # The endpoints are independent, so call them concurrently over one
+    # keep-alive session and print the results in order
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [
+            executor.submit(_call_escalation_api, session, base_url, method, path, label, json)
+            for method, path, label, json in calls
+        ]
+        for future in futures:
+            print(future.result())
     
     print("✅ Escalation API tests completed")
 
-def test_escalation_flow():
+def test_escalation_flow(keep_test_data=False):
     """Test the complete escalation flow"""
     print("\n🔄 Testing Complete Escalation Flow...")
     
-    db = Database()
+    db = _get_database()
     escalation_logic = EscalationLogic()
     
     # Get current time
@@ -120,18 +124,18 @@ def test_escalation_flow():
     print("Creating test reminder...")
     
     # Get a customer
-    customers = db.get_customers()
-    if not customers:
+    customer = db.get_first_customer()
+    if not customer:
         print("❌ No customers found for testing")
         return
-    
-    customer = customers[0]
+
     print(f"Using customer: {customer['name']} ({customer['phone_number']})")
     
     # Create a test daily reminder
     reminder_date = current_time.date().isoformat()
     reminder_time = current_time.strftime('%H:%M')
     test_message = "Test reminder message"
+    reminder_id = None
     
     try:
         # Create daily reminder
@@ -154,12 +158,7 @@ def test_escalation_flow():
         print(f"✅ Created test reminder (ID: {reminder_id})")
         
         # Check if it needs escalation
-        reminders_needing_escalation = db.get_reminders_needing_escalation()
-        test_reminder = None
-        for reminder in reminders_needing_escalation:
-            if reminder['id'] == reminder_id:
-                test_reminder = reminder
-                break
+        test_reminder = db.get_reminder_needing_escalation(reminder_id)
         
         if test_reminder:
             print(f"✅ Test reminder found in escalation queue")
@@ -180,19 +179,30 @@ def test_escalation_flow():
                 print("❌ Reminder should not be escalated")
         else:
             print("❌ Test reminder not found in escalation queue")
-        
-        # Clean up test reminder
-        print("Cleaning up test reminder...")
-        # Note: In a real test, you might want to delete the test reminder
-        # For now, we'll just leave it for inspection
-        
+    
     except Exception as e:
         print(f"❌ Error in escalation flow test: {e}")
+    finally:
+        # Clean up test reminder so it doesn't linger in the escalation queue
+        if reminder_id is not None:
+            if keep_test_data:
+                print(f"Keeping test reminder (ID: {reminder_id}) for inspection")
+            else:
+                print("Cleaning up test reminder...")
+                try:
+                    db.delete_daily_reminder(reminder_id)
+                except Exception as e:
+                    print(f"❌ Error deleting test reminder: {e}")
     
     print("✅ Escalation flow test completed")
 
 def main():
     """Run all escalation tests"""
+    parser = argparse.ArgumentParser(description="Test the escalation system")
+    parser.add_argument('--keep-test-data', action='store_true',
+                        help="leave the test reminder in the database for inspection")
+    args = parser.parse_args()
+
     print("🚀 Starting Escalation System Tests...")
     print("=" * 50)
     
@@ -213,7 +223,7 @@ def main():
         print("\n" + "=" * 50)
         print("🔄 Complete Flow Test")
         print("=" * 50)
-        test_escalation_flow()
+        test_escalation_flow(keep_test_data=args.keep_test_data)
         
         print("\n" + "=" * 50)
         print("✅ All escalation tests completed!")
@@ -221,7 +231,6 @@ def main():
         
     except Exception as e:
         print(f"\n❌ Test failed with error: {e}")
-        import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
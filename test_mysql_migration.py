@@ -5,14 +5,64 @@ Test script to verify MySQL database connectivity for Railway deployment
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 
+# One Database instance (and one run of its table-creation DDL) for all tests
+_db = None
+_db_info = None
+
+def _get_database():
+    """Get the shared Database instance, creating it on first use"""
+    global _db
+    if _db is None:
+        from database import Database
+        _db = Database()
+    return _db
+
+def _collect_db_info(db):
+    """
+    Get the database name, server version, tables and indexes over one connection
+    
+    Args:
+        db: Database instance
+    
+    Returns:
+        Dictionary with db_name, version, tables and indexes (cached after the first call)
+    """
+    global _db_info
+    if _db_info is None:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DATABASE() as db_name, VERSION() as version")
+            db_name, version = cursor.fetchone()
+            # Stream the table names straight into a set rather than fetchall()-ing a list first.
+            # The cursor is drained fully (no early break) since the connection is reused below
+            cursor.execute("SHOW TABLES")
+            tables = {name for (name,) in cursor}
+            cursor.execute('''
+                SELECT DISTINCT index_name FROM information_schema.statistics
+                WHERE table_schema = DATABASE()
+            ''')
+            indexes = {index[0] for index in cursor.fetchall()}
+        _db_info = {'db_name': db_name, 'version': version, 'tables': tables, 'indexes': indexes}
+    return _db_info
+
+def _warm_database():
+    """Create the shared Database and fill its connection pool ahead of the connection test"""
+    try:
+        _collect_db_info(_get_database())
+    except Exception:
+        # The connection test reports the error when it retries
+        pass
+
 def test_config():
     """Test that configuration is loaded correctly"""
     print("🔧 Testing configuration...")
     
     print(f"USE_MYSQL: {Config.USE_MYSQL}")
     print(f"DATABASE_URL present: {'✅' if Config.DATABASE_URL else '❌'}")
+    print(f"DB_POOL_SIZE: {Config.DB_POOL_SIZE}")
     
     if not Config.USE_MYSQL:
         print("❌ USE_MYSQL is False - set USE_MYSQL=true in environment")
@@ -25,31 +75,27 @@ def test_mysql_connection():
     print("\n🗄️  Testing MySQL connection...")
     
     try:
-        from database import Database
-        
         # Try to create database instance
         print("Creating Database instance...")
-        db = Database()
+        db = _get_database()
         print("✅ Database instance created successfully")
         
-        # Try to get connection
+        # Try to get connection and database info
         print("Testing database connection...")
-        with db.get_connection() as conn:
-            if conn.is_connected():
-                print("✅ MySQL connection successful")
-                
-                # Get database info
-                cursor = conn.cursor()
-                cursor.execute("SELECT DATABASE() as db_name, VERSION() as version")
-                result = cursor.fetchone()
-                print(f"📊 Database: {result[0]}")
-                print(f"🔧 MySQL Version: {result[1]}")
-                
-                return True
-            else:
-                print("❌ Connection failed")
-                return False
-                
+        info = _collect_db_info(db)
+        print("✅ MySQL connection successful")
+        print(f"📊 Database: {info['db_name']}")
+        print(f"🔧 MySQL Version: {info['version']}")
+        
+        # The tests share pooled connections rather than logging in for each query
+        pool_size = db.get_pool_size()
+        print(f"🏊 Connection pool size: {pool_size}")
+        if pool_size != Config.DB_POOL_SIZE:
+            print(f"❌ Connection pool size doesn't match DB_POOL_SIZE ({Config.DB_POOL_SIZE})")
+            return False
+        
+        return True
+        
     except ImportError as e:
         print(f"❌ Import error: {e}")
         print("💡 Try installing mysql-connector-python: pip install mysql-connector-python")
@@ -67,31 +113,34 @@ def test_table_creation():
     print("\n📋 Testing table creation...")
     
     try:
-        from database import Database
-        
-        db = Database()
+        db = _get_database()
         print("✅ Tables created successfully")
         
-        # Test a simple query
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-            
-            expected_tables = ['messages', 'reminders', 'statistics', 'customers', 'daily_reminders']
-            found_tables = [table[0] for table in tables]
-            
-            print(f"📊 Found tables: {found_tables}")
-            
-            all_tables_exist = all(table in found_tables for table in expected_tables)
-            if all_tables_exist:
-                print("✅ All required tables exist")
-                return True
-            else:
-                missing = [t for t in expected_tables if t not in found_tables]
-                print(f"❌ Missing tables: {missing}")
-                return False
-                
+        # Check the table and index lists collected with the connection test
+        info = _collect_db_info(db)
+        found_tables = info['tables']
+        
+        expected_tables = {'messages', 'reminders', 'statistics', 'customers', 'daily_reminders'}
+        expected_indexes = {
+            'idx_daily_reminders_date_time', 'idx_daily_reminders_escalation',
+            'idx_customers_active_time', 'idx_reminders_sent_time', 'idx_messages_timestamp'
+        }
+        
+        print(f"📊 Found tables: {sorted(found_tables)}")
+        
+        missing = expected_tables - found_tables
+        if missing:
+            print(f"❌ Missing tables: {sorted(missing)}")
+            return False
+        print("✅ All required tables exist")
+        
+        missing_indexes = expected_indexes - info['indexes']
+        if missing_indexes:
+            print(f"❌ Missing indexes: {sorted(missing_indexes)}")
+            return False
+        print("✅ All query indexes exist")
+        return True
+        
     except Exception as e:
         print(f"❌ Table creation error: {e}")
         return False
@@ -101,9 +150,7 @@ def test_basic_operations():
     print("\n🔄 Testing basic operations...")
     
     try:
-        from database import Database
-        
-        db = Database()
+        db = _get_database()
         
         # Test saving a message
         test_message = {
@@ -148,15 +195,27 @@ def main():
         print("  - Or MYSQL_HOST, MYSQL_PORT, MYSQL_DATABASE, MYSQL_USER, MYSQL_PASSWORD")
         print("\nFor Railway deployment, DATABASE_URL will be provided automatically.")
         
+    # Configuration doesn't touch the database, so warm the connection pool
+    # while it runs; the database tests then run in order against it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        warm_future = executor.submit(_warm_database)
+        try:
+            config_ok = test_config()
+            if not config_ok:
+                print("\n❌ Configuration test failed")
+        except Exception as e:
+            print(f"\n❌ Configuration test crashed: {e}")
+            config_ok = False
+        warm_future.result()
+
     tests = [
-        ("Configuration", test_config),
         ("MySQL Connection", test_mysql_connection),
         ("Table Creation", test_table_creation),
         ("Basic Operations", test_basic_operations)
     ]
     
-    passed = 0
-    total = len(tests)
+    passed = 1 if config_ok else 0
+    total = len(tests) + 1
     
     for test_name, test_func in tests:
         try:
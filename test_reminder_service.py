@@ -7,7 +7,50 @@ Tests the HTTP API communication between reminder service and main app
 import os
 import sys
 import requests
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+import json_utils
+
+# One session for all probes so they reuse a keep-alive connection to the main app
+_session = requests.Session()
+
+# Reminder endpoints to probe, built once (with a single timestamp) at import
+Endpoint = namedtuple('Endpoint', 'path method body')
+ENDPOINTS = [
+    Endpoint('/api/reminders/last-date', 'GET', None),
+    Endpoint('/api/reminders/missed-info', 'POST', {'days_back': 7}),
+    Endpoint('/api/reminders/save', 'POST', {
+        'scheduled_time': datetime.now(timezone.utc).isoformat(),
+        'message': 'Test reminder message'
+    }),
+]
+
+def _probe_endpoint(main_app_url, endpoint):
+    """Call one reminder endpoint and return the lines to print for it"""
+    path = endpoint.path
+    try:
+        if endpoint.body is None:
+            response = _session.request(endpoint.method, f"{main_app_url}{path}", timeout=10)
+        else:
+            response = _session.request(
+                endpoint.method,
+                f"{main_app_url}{path}",
+                data=json_utils.dumps_bytes(endpoint.body),
+                headers={'Content-Type': 'application/json'},
+                timeout=10
+            )
+        
+        if response.status_code == 200:
+            lines = [f"✅ {path} working"]
+            result = json_utils.loads(response.content)
+            if result:
+                lines.append(f"   Response: {result}")
+            return lines
+        return [f"❌ {path} failed: {response.status_code} - {response.text}"]
+    
+    except Exception as e:
+        return [f"❌ {path} error: {e}"]
 
 def test_main_app_endpoints(main_app_url):
     """Test main app API endpoints"""
@@ -15,7 +58,7 @@ def test_main_app_endpoints(main_app_url):
     
     # Test health endpoint
     try:
-        response = requests.get(f"{main_app_url}/health", timeout=10)
+        response = _session.get(f"{main_app_url}/health", timeout=10)
         if response.status_code == 200:
             print("✅ Health endpoint working")
         else:
@@ -25,33 +68,13 @@ def test_main_app_endpoints(main_app_url):
         print(f"❌ Health endpoint error: {e}")
         return False
     
-    # Test reminder endpoints
-    endpoints = [
-        ('/api/reminders/last-date', 'GET'),
-        ('/api/reminders/missed-info', 'POST', {'days_back': 7}),
-        ('/api/reminders/save', 'POST', {
-            'scheduled_time': datetime.now(timezone.utc).isoformat(),
-            'message': 'Test reminder message'
-        })
-    ]
-    
-    for endpoint, method, *args in endpoints:
-        try:
-            if method == 'GET':
-                response = requests.get(f"{main_app_url}{endpoint}", timeout=10)
-            elif method == 'POST':
-                data = args[0] if args else {}
-                response = requests.post(f"{main_app_url}{endpoint}", json=data, timeout=10)
-            
-            if response.status_code == 200:
-                print(f"✅ {endpoint} working")
-                if response.json():
-                    print(f"   Response: {response.json()}")
-            else:
-                print(f"❌ {endpoint} failed: {response.status_code} - {response.text}")
-                
-        except Exception as e:
-            print(f"❌ {endpoint} error: {e}")
+    # Test reminder endpoints. They are independent, so probe them concurrently
+    # once the health check has passed and print the results in order
+    with ThreadPoolExecutor(max_workers=len(ENDPOINTS)) as executor:
+        futures = [executor.submit(_probe_endpoint, main_app_url, endpoint) for endpoint in ENDPOINTS]
+        for future in futures:
+            for line in future.result():
+                print(line)
     
     return True
 